@@ -0,0 +1,343 @@
+"""
+Headless data path benchmarks
+
+Drives the TodoApp and NotepadApp data paths (add_task, toggles,
+get_filtered_tasks, save_tasks/load_tasks, save_note, load_notes)
+against synthetic datasets, with Kivy stubbed out so no window opens.
+Each case reports throughput, latency percentiles and peak traced
+memory. Results are written as JSON so runs from different versions
+can be compared with --compare.
+
+Usage: python benchmarks/bench_data_paths.py [--sizes N ...] [--storage MODE ...]
+                                             [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import headless
+
+headless.install()
+
+import main
+import notepad
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+STORAGE_MODES = ["json", "journal", "shared", "sqlite"]
+CATEGORIES = ["General", "Work", "Personal", "Shopping", "Health", "Study"]
+
+# Operations timed per case, kept low for the cases that are O(n) each
+LOAD_REPEATS = 5
+MUTATIONS = 200
+QUERIES = 50
+FILTERS = [
+    ("all", "All", ""),
+    ("active", "All", ""),
+    ("completed", "Work", ""),
+    ("all", "All", "number 1"),
+    ("active", "Health", "task"),
+]
+
+
+def make_tasks(count):
+    return [
+        {
+            "id": i,
+            "text": f"Synthetic task number {i}",
+            "completed": i % 3 == 0,
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "created_at": f"2025-12-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}"
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def make_notes(count):
+    return [
+        {
+            "title": f"Note {i}",
+            "content": f"Synthetic note body {i} with some words to index\n" * 20,
+            "color": "#FFE0B2",
+            "date": "Jan 01, 2026"
+        }
+        for i in range(count)
+    ]
+
+
+def stub_todo_screen():
+    return SimpleNamespace(
+        current_filter="all",
+        current_category_filter="All",
+        search_text="",
+        current_sort="list",
+        group_by_category=False,
+        selected=set(),
+        task_list=SimpleNamespace(set_rows=lambda rows, more=False: None),
+        stats_label=SimpleNamespace(text="")
+    )
+
+
+def stub_notepad_root():
+    screens = {
+        "notes_list": SimpleNamespace(ids=SimpleNamespace(
+            notes_view=SimpleNamespace(data=[], scroll_y=1),
+            notes_grid=SimpleNamespace(cols=2)
+        )),
+        "note_editor": SimpleNamespace(ids=SimpleNamespace(
+            title_field=SimpleNamespace(text=""),
+            content_field=SimpleNamespace(text="", height=0, opacity=1, disabled=False),
+            large_field=SimpleNamespace(height=0, opacity=0, disabled=True, close_buffer=lambda: None)
+        )),
+    }
+    return SimpleNamespace(
+        current="notes_list",
+        get_screen=lambda name: screens[name],
+        has_screen=lambda name: name in screens
+    )
+
+
+def new_todo_app(mode):
+    app = main.TodoApp()
+    app.todo = main.TodoList(storage_mode=mode, on_change=app.dispatch, on_refresh=app.update_display)
+    app.todo_screen = stub_todo_screen()
+    return app
+
+
+def todo_cases(mode, size):
+    """Yield (case name, setup, operation, repeats) for one storage mode and size"""
+    with open("todo_data.json", "w") as f:
+        json.dump({"tasks": make_tasks(size), "next_id": size + 1, "categories": CATEGORIES}, f)
+    if mode == "sqlite":
+        # Do the one-off migration outside the timed load
+        warm = new_todo_app(mode)
+        warm.load_tasks()
+        warm.on_stop()
+
+    state = {}
+
+    def load():
+        app = new_todo_app(mode)
+        app.load_tasks()
+        app.tasks_loaded = True
+        state["app"] = app
+
+    def close_loaded():
+        if "app" in state:
+            state.pop("app").on_stop()
+
+    yield "load_tasks", close_loaded, load, LOAD_REPEATS
+
+    def open_app():
+        close_loaded()
+        load()
+
+    counter = iter(range(10 ** 9))
+    yield "add_task", open_app, lambda: state["app"].add_task(f"Added task {next(counter)}", "Work"), MUTATIONS
+
+    ids = iter(range(1, 10 ** 9))
+    yield ("toggle_task_completion", None,
+           lambda: state["app"].toggle_task_completion(1 + next(ids) * 7919 % size), MUTATIONS)
+
+    filters = iter(range(10 ** 9))
+
+    def query():
+        screen = state["app"].todo_screen
+        screen.current_filter, screen.current_category_filter, screen.search_text = FILTERS[next(filters) % len(FILTERS)]
+        state["app"].get_filtered_tasks()
+
+    yield "get_filtered_tasks", None, query, QUERIES
+    yield "save_tasks", None, lambda: state["app"].save_tasks(), LOAD_REPEATS
+    yield "close", None, close_loaded, 1
+
+
+def notepad_cases(size):
+    with open("notes.json", "w") as f:
+        json.dump(make_notes(size), f)
+    # Split into the per-note layout outside the timed load
+    notepad.NoteFileStore("notes", "notes.json").load()
+
+    state = {}
+
+    def new_app():
+        app = notepad.NotepadApp()
+        app.root = stub_notepad_root()
+        return app
+
+    def load():
+        app = new_app()
+        app.load_notes()
+        state["app"] = app
+        state["note_ids"] = list(app.notes)
+
+    yield "load_notes", None, load, LOAD_REPEATS
+
+    counter = iter(range(10 ** 9))
+
+    def save_note():
+        app = state["app"]
+        note_ids = state["note_ids"]
+        i = next(counter)
+        if i % 2:
+            app.open_note(note_ids[i * 7919 % len(note_ids)])
+        else:
+            app.new_note()
+        editor = app.get_editor_screen()
+        editor.ids.title_field.text = f"Saved note {i}"
+        editor.ids.content_field.text = f"Saved note body {i}\n" * 20
+        app.save_note()
+
+    yield "save_note", None, save_note, MUTATIONS
+    yield "close", None, lambda: state["app"].on_stop(), 1
+
+
+def run_cases(cases, traced):
+    """Run cases in order, returning {case: (latencies, peak bytes)}"""
+    results = {}
+    for name, setup, operation, repeats in cases:
+        if setup:
+            setup()
+        gc.collect()
+        if traced:
+            tracemalloc.reset_peak()
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - start)
+        peak = tracemalloc.get_traced_memory()[1] if traced else None
+        results[name] = (latencies, peak)
+    return results
+
+
+def measure(make_cases):
+    """Time the cases, then run them again under tracemalloc for peak memory"""
+    timings = {}
+    peaks = {}
+    for traced in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            cwd = os.getcwd()
+            os.chdir(directory)
+            if traced:
+                tracemalloc.start()
+            try:
+                results = run_cases(make_cases(), traced)
+            finally:
+                if traced:
+                    tracemalloc.stop()
+                os.chdir(cwd)
+        for name, (latencies, peak) in results.items():
+            if traced:
+                peaks[name] = peak
+            else:
+                timings[name] = latencies
+    return timings, peaks
+
+
+def summarize(app, storage, size, timings, peaks):
+    rows = []
+    for name, latencies in timings.items():
+        ordered = sorted(latencies)
+
+        def percentile(p):
+            return round(1000 * ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+        total = sum(latencies)
+        rows.append({
+            "app": app,
+            "case": name,
+            "storage": storage,
+            "size": size,
+            "ops": len(latencies),
+            "total_s": round(total, 4),
+            "ops_per_s": round(len(latencies) / total, 1) if total else None,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(1000 * ordered[-1], 3),
+            "peak_mb": round(peaks[name] / 2 ** 20, 2)
+        })
+    return rows
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def result_key(row):
+    return row["app"], row["case"], row["storage"], row["size"]
+
+
+def print_rows(rows, baseline=None):
+    header = f"{'app':<8} {'case':<24} {'storage':<8} {'size':>7} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    for row in rows:
+        line = (f"{row['app']:<8} {row['case']:<24} {row['storage']:<8} {row['size']:>7} "
+                f"{row['ops_per_s'] or 0:>10} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+                f"{row['p99_ms']:>9} {row['peak_mb']:>8}")
+        if baseline:
+            old = baseline.get(result_key(row))
+            if old and old["p50_ms"]:
+                line += f" {row['p50_ms'] / old['p50_ms']:>11.2f}x"
+        print(line)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="dataset sizes")
+    parser.add_argument("--storage", nargs="+", choices=STORAGE_MODES, default=STORAGE_MODES,
+                        help="TodoApp storage modes to run")
+    parser.add_argument("--output", help="results file (default benchmarks/results/data_paths-<git rev>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare p50 latency against")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    rows = []
+    for size in args.sizes:
+        for mode in args.storage:
+            timings, peaks = measure(lambda: todo_cases(mode, size))
+            rows += summarize("todo", mode, size, timings, peaks)
+        timings, peaks = measure(lambda: notepad_cases(size))
+        rows += summarize("notepad", "files", size, timings, peaks)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {result_key(row): row for row in json.load(f)["results"]}
+    print_rows(rows, baseline)
+
+    output = args.output or os.path.join(BENCH_DIR, "results", f"data_paths-{revision}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "revision": revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": rows
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main_cli()
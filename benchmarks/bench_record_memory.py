@@ -0,0 +1,75 @@
+"""
+Record memory benchmark
+
+Builds the same synthetic tasks and notes as plain dicts and as the
+__slots__ records from records.py, and reports the traced bytes per
+record for each.
+
+Usage: python benchmarks/bench_record_memory.py [count]
+"""
+
+import gc
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from records import Note, Task
+
+CATEGORIES = ["General", "Work", "Personal", "Shopping", "Health", "Study"]
+COLORS = ["#FFFFFF", "#FFE0B2", "#C8E6C9", "#BBDEFB"]
+DEFAULT_COUNT = 100000
+
+
+def task_dict(i):
+    return {
+        "id": i,
+        "text": f"Synthetic task number {i}",
+        "completed": i % 3 == 0,
+        # Built per record, the way json.load hands them back
+        "category": "".join(CATEGORIES[i % len(CATEGORIES)]),
+        "created_at": f"2025-12-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}"
+    }
+
+
+def note_dict(i):
+    return {
+        "title": f"Note {i}",
+        "color": "".join(COLORS[i % len(COLORS)]),
+        "date": "Jan 01, 2026",
+        "file": f"{i:032x}.txt",
+        "snippet": f"Synthetic note body {i}",
+        "size": 1000 + i,
+        "hash": i * 2654435761 % 2 ** 32
+    }
+
+
+def traced_size(build, count):
+    """Bytes allocated per item by build(i), with the input dicts excluded"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return (after - before) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    cases = [
+        ("task dict", task_dict),
+        ("Task", lambda i: Task.from_dict(task_dict(i))),
+        ("note dict", note_dict),
+        ("Note", lambda i: Note.from_dict(note_dict(i))),
+    ]
+    print(f"{'record':<10} {'bytes/record':>13}")
+    for name, build in cases:
+        print(f"{name:<10} {traced_size(build, count):>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Startup timing harness
+
+Starts TodoApp and NotepadApp against synthetic data in a scratch
+directory and reports, in ms since the harness process started, when
+each startup phase finished: Kivy import, app module import, build,
+first frame drawn, first page of data shown and all data shown.
+
+Usage: python benchmarks/bench_startup.py [--items N] [--runs N]
+"""
+
+import time
+
+START = time.perf_counter()
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(os.path.dirname(__file__)))
+PHASES = ["kivy", "import", "build", "first_frame", "first_page", "data_shown"]
+
+
+def since_start():
+    return round((time.perf_counter() - START) * 1000, 1)
+
+
+def write_data(directory, items):
+    """Write a synthetic todo_data.json and notes store"""
+    categories = ["General", "Work", "Personal", "Shopping", "Health", "Study"]
+    with open(os.path.join(directory, "todo_data.json"), "w") as f:
+        json.dump({
+            "tasks": [
+                {
+                    "id": i,
+                    "text": f"Synthetic task number {i}",
+                    "completed": i % 3 == 0,
+                    "category": categories[i % len(categories)],
+                    "created_at": "2025-12-29 00:20"
+                }
+                for i in range(1, items + 1)
+            ],
+            "next_id": items + 1,
+            "categories": categories
+        }, f)
+    with open(os.path.join(directory, "notes.json"), "w") as f:
+        json.dump([
+            {
+                "title": f"Note {i}",
+                "content": f"Synthetic note body {i}\n" * 20,
+                "color": "#FFE0B2",
+                "date": "Jan 01, 2026"
+            }
+            for i in range(items)
+        ], f)
+    
+    # Split the notes into the per-note layout up front, so runs time a normal
+    # start rather than the one-off migration
+    sys.path.insert(0, ROOT)
+    from note_storage import NoteFileStore
+    NoteFileStore(os.path.join(directory, "notes"), os.path.join(directory, "notes.json")).load()
+
+
+def run_one(app_name):
+    """Start one app, print its phase timings as a JSON line and exit"""
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    sys.path.insert(0, ROOT)
+    timings = {}
+    
+    import kivymd.app
+    timings["kivy"] = since_start()
+    if app_name == "todo":
+        import main
+    else:
+        import notepad
+    timings["import"] = since_start()
+    
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+    
+    class StartupTimer:
+        def build(self):
+            root = super().build()
+            timings["build"] = since_start()
+            return root
+        
+        def on_start(self):
+            super().on_start()
+            Window.bind(on_flip=self.first_flip)
+        
+        def first_flip(self, *args):
+            Window.unbind(on_flip=self.first_flip)
+            timings["first_frame"] = since_start()
+        
+        def first_page(self):
+            timings["first_page"] = since_start()
+        
+        def data_shown(self):
+            # With nothing to read ahead the first page is the full load
+            timings.setdefault("first_page", since_start())
+            timings["data_shown"] = since_start()
+            # Stop once the frame with the data has been drawn
+            Clock.schedule_once(lambda dt: self.stop(), 0)
+    
+    if app_name == "todo":
+        class TimedApp(StartupTimer, main.TodoApp):
+            def show_first_tasks(self, *args):
+                super().show_first_tasks(*args)
+                if "data_shown" not in timings:
+                    self.first_page()
+            
+            def load_initial_tasks(self, *args):
+                super().load_initial_tasks(*args)
+                self.data_shown()
+    else:
+        class TimedApp(StartupTimer, notepad.NotepadApp):
+            def show_first_notes(self, *args):
+                super().show_first_notes(*args)
+                if "data_shown" not in timings:
+                    self.first_page()
+            
+            def load_initial_notes(self, *args):
+                super().load_initial_notes(*args)
+                self.data_shown()
+    
+    TimedApp().run()
+    print(json.dumps(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000, help="tasks and notes to generate")
+    parser.add_argument("--runs", type=int, default=3, help="runs per app, the median is reported")
+    parser.add_argument("--run", choices=["todo", "notepad"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run:
+        run_one(args.run)
+        return
+    
+    data_dir = tempfile.mkdtemp()
+    write_data(data_dir, args.items)
+    
+    print(f"{'app':>8} " + " ".join(f"{phase:>11}" for phase in PHASES))
+    for app_name in ("todo", "notepad"):
+        runs = []
+        for _ in range(args.runs):
+            # Fresh copy each run so files written on exit do not carry over
+            with tempfile.TemporaryDirectory() as directory:
+                run_dir = os.path.join(directory, "data")
+                shutil.copytree(data_dir, run_dir)
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--run", app_name],
+                    cwd=run_dir, capture_output=True, text=True, check=True
+                ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        medians = [sorted(run[phase] for run in runs)[len(runs) // 2] for phase in PHASES]
+        print(f"{app_name:>8} " + " ".join(f"{value:>11}" for value in medians))
+    
+    shutil.rmtree(data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Task list frame time benchmark
+
+Runs TodoApp with a synthetic task list of each size and records the
+frame time while the list is refreshed and scrolled.
+
+Usage: python benchmarks/bench_task_list.py [count ...]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_COUNTS = [100, 1000, 5000, 10000]
+FRAMES = 120
+
+
+def run_one(count):
+    """Run the app with count tasks and print one JSON result line"""
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    sys.path.insert(0, ROOT)
+    
+    from kivy.clock import Clock
+    import main
+    from records import Task
+    from task_store import TaskStore
+    
+    class BenchTodoApp(main.TodoApp):
+        def load_tasks(self):
+            self.todo.store = TaskStore(
+                Task(
+                    i,
+                    f"Synthetic task number {i}",
+                    completed=i % 3 == 0,
+                    category=self.categories[i % len(self.categories)],
+                    created_at="2025-12-29 00:20"
+                )
+                for i in range(1, count + 1)
+            )
+            self.todo.next_id = count + 1
+            self.todo.save = lambda changed=(), removed=(): None
+        
+        def on_stop(self):
+            pass
+        
+        def on_start(self):
+            super().on_start()
+            self.frame_times = []
+            # Let the first layout settle before measuring
+            Clock.schedule_once(lambda dt: Clock.schedule_interval(self.bench_frame, 0), 0.5)
+        
+        def bench_frame(self, dt):
+            frame = len(self.frame_times)
+            self.frame_times.append(dt)
+            
+            # Alternate list updates (as on toggle/keystroke) and scrolling
+            if frame % 2:
+                self.toggle_task_completion(1 + frame % count)
+            task_list = self.todo_screen.task_list
+            task_list.scroll_y = 1 - (frame % 20) / 20
+            
+            if frame >= FRAMES:
+                self.views = len(task_list.layout_manager.children)
+                self.stop()
+                return False
+    
+    app = BenchTodoApp()
+    app.run()
+    
+    times = sorted(app.frame_times[1:])
+    print(json.dumps({
+        "tasks": count,
+        "frames": len(times),
+        "mean_ms": round(1000 * sum(times) / len(times), 2),
+        "p95_ms": round(1000 * times[int(len(times) * 0.95)], 2),
+        "max_ms": round(1000 * times[-1], 2),
+        "views": app.views
+    }))
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        run_one(int(sys.argv[2]))
+        return
+    
+    counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS
+    print(f"{'tasks':>8} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'views':>6}")
+    for count in counts:
+        # One app per process, Kivy does not like being restarted
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run", str(count)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['tasks']:>8} {result['mean_ms']:>9} {result['p95_ms']:>9} "
+              f"{result['max_ms']:>9} {result['views']:>6}")
+
+
+if __name__ == "__main__":
+    main()
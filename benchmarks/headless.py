@@ -0,0 +1,76 @@
+"""
+Headless stand-ins for Kivy and KivyMD
+
+install() makes every kivy / kivymd import resolve to stub modules, so
+main.py and notepad.py can be imported and their data paths driven
+without creating a window. Every class, function and value in those
+modules is a Stub that accepts any arguments and attribute access.
+"""
+
+import importlib.abc
+import importlib.machinery
+import sys
+import types
+
+STUBBED_PACKAGES = ("kivy", "kivymd")
+
+
+class StubMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Stub()
+
+
+class Stub(metaclass=StubMeta):
+    """Any Kivy class, function or value"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return Stub()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Stub()
+
+    def __iter__(self):
+        return iter(())
+
+
+class StubModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        # Make every stub module a package so submodule imports work
+        self.__path__ = []
+        self.stubs = {}
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name not in self.stubs:
+            self.stubs[name] = StubMeta(name, (Stub,), {"__module__": self.__name__})
+        return self.stubs[name]
+
+
+class StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split(".")[0] in STUBBED_PACKAGES:
+            return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        return StubModule(spec.name)
+
+    def exec_module(self, module):
+        pass
+
+
+def install():
+    """Stub out kivy and kivymd, must run before the apps are imported"""
+    for name in STUBBED_PACKAGES:
+        if name in sys.modules:
+            raise RuntimeError(f"{name} was imported before the headless stubs were installed")
+    sys.meta_path.insert(0, StubFinder())
@@ -0,0 +1,209 @@
+"""
+Phenry Todo Application - Import/Export
+Streams tasks and notes to and from JSON Lines and CSV files, one record at a time
+"""
+
+import csv
+import json
+import os
+import re
+
+from records import Note, Task
+
+TASK_FIELDS = ("id", "text", "completed", "category", "created_at")
+NOTE_FIELDS = ("id", "title", "color", "date", "content")
+
+# Records handed to the save path at a time while importing
+IMPORT_BATCH = 1000
+
+# Problems kept for the import report, the rest are only counted
+MAX_ERRORS = 20
+
+TRUE_VALUES = {"true", "1", "yes", "y", "x", "done"}
+FALSE_VALUES = {"false", "0", "no", "n", ""}
+COLOR_RE = re.compile(r"#[0-9A-Fa-f]{6}")
+NOTE_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class TransferReport:
+    """Counts of what an import did, plus the first few problems found"""
+
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = []
+
+    def error(self, number, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f"Line {number}: {message}")
+
+    def summary(self, noun):
+        text = f"{self.added} {noun} added, {self.updated} updated, {self.skipped} skipped"
+        if self.errors:
+            text += "\n\n" + "\n".join(self.errors)
+            if self.skipped > len(self.errors):
+                text += f"\n... and {self.skipped - len(self.errors)} more"
+        return text
+
+
+def file_format(path):
+    """Get "jsonl" or "csv" from a file name"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Unsupported file type '{extension}', use .jsonl or .csv")
+
+
+def read_records(path):
+    """Yield (line number, record) for each record in a JSON Lines or CSV file
+
+    record is None for a JSON line that does not hold an object.
+    """
+    if file_format(path) == "csv":
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield number, record if isinstance(record, dict) else None
+
+
+def write_records(path, records, fields):
+    """Stream record dicts into a JSON Lines or CSV file, returning the count
+
+    The file is written next to path and moved into place when complete.
+    """
+    csv_format = file_format(path) == "csv"
+    count = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        if csv_format:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+        for record in records:
+            if csv_format:
+                writer.writerow(record)
+            else:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"'{value}' is not a yes/no value")
+
+
+def text_field(record, key, default=""):
+    value = record.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ValueError(f"'{key}' must be text")
+    return value
+
+
+def task_from_record(record):
+    """Build a Task from an import record, with id None when it has none"""
+    if record is None:
+        raise ValueError("not a JSON object")
+    task_id = record.get("id")
+    if task_id in (None, ""):
+        task_id = None
+    else:
+        try:
+            task_id = int(task_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"id '{task_id}' is not a number") from None
+        if task_id < 1:
+            raise ValueError(f"id {task_id} is not positive")
+
+    text = text_field(record, "text").strip()
+    if not text:
+        raise ValueError("task text is empty")
+    return Task(
+        task_id,
+        text,
+        completed=parse_bool(record.get("completed", False)),
+        category=text_field(record, "category").strip() or "General",
+        created_at=text_field(record, "created_at")
+    )
+
+
+def note_from_record(record):
+    """Build a (Note, content) pair from an import record
+
+    The record id becomes the note id, so importing an export again
+    updates the same notes. A record without one gets a new id on save.
+    """
+    if record is None:
+        raise ValueError("not a JSON object")
+    note_id = record.get("id")
+    if note_id in (None, ""):
+        note_id = None
+    else:
+        note_id = str(note_id)
+        if not NOTE_ID_RE.fullmatch(note_id):
+            raise ValueError(f"id '{note_id}' may only hold letters, digits, '-' and '_'")
+
+    title = text_field(record, "title").strip()
+    content = text_field(record, "content")
+    if not title and not content:
+        raise ValueError("note is empty")
+    color = text_field(record, "color", "#FFFFFF") or "#FFFFFF"
+    if not COLOR_RE.fullmatch(color):
+        raise ValueError(f"color '{color}' is not #RRGGBB")
+    note = Note(title=title or "Untitled", color=color.upper(), date=text_field(record, "date"), id=note_id)
+    return note, content
+
+
+def iter_tasks(path, report):
+    """Yield each valid task in an import file, noting bad records in report"""
+    for number, record in read_records(path):
+        try:
+            yield task_from_record(record)
+        except ValueError as e:
+            report.error(number, e)
+
+
+def iter_notes(path, report):
+    """Yield (note, content) for each valid note in an import file"""
+    for number, record in read_records(path):
+        try:
+            yield note_from_record(record)
+        except ValueError as e:
+            report.error(number, e)
+
+
+def task_record(task):
+    return task.to_dict()
+
+
+def note_record(note, content):
+    return {
+        "id": note.id,
+        "title": note.title,
+        "color": note.color,
+        "date": note.date,
+        "content": content
+    }
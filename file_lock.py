@@ -0,0 +1,41 @@
+"""
+Phenry Todo Application - File Locks
+Advisory locks and cheap change checks for data files shared between processes
+"""
+
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+def acquire_lock(path):
+    """Open path and take an exclusive advisory lock on it, closing the file releases it
+
+    Each call opens the file anew, so two threads of one process exclude
+    each other as well as other processes do.
+    """
+    lock_file = open(path, 'a+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+    except BaseException:
+        lock_file.close()
+        raise
+    return lock_file
+
+
+def file_identity(path):
+    """(inode, size, mtime) of a file, changing whenever it is rewritten, or None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
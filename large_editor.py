@@ -0,0 +1,110 @@
+from kivy.clock import Clock
+from kivy.uix.textinput import TextInput
+
+# Lines of the buffer laid out at a time
+WINDOW_LINES = 400
+
+
+class LargeTextInput(TextInput):
+    """Multiline input for note bodies too big to lay out in one go.
+
+    The text lives in a PieceTable and the input only holds a window of
+    WINDOW_LINES lines of it. Scrolling near either end of the window
+    writes any edits back into the buffer and moves the window along, so
+    typing and scrolling cost the same whatever the size of the note.
+    on_edit is dispatched for changes made by the user, not for moving
+    the window.
+    """
+
+    __events__ = ('on_edit',)
+
+    def __init__(self, **kwargs):
+        self.buffer = None
+        # The window holds lines first_line onwards, buffer offsets start to end
+        self.first_line = 0
+        self.window_start = 0
+        self.window_end = 0
+        self.window_dirty = False
+        self.loading = False
+        super().__init__(**kwargs)
+        self.window_trigger = Clock.create_trigger(self.check_window)
+        self.bind(text=self.on_window_text, scroll_y=self.window_trigger, height=self.window_trigger)
+
+    def on_edit(self):
+        pass
+
+    def open_buffer(self, buffer, line=0):
+        """Show buffer with the cursor at the start of line"""
+        self.buffer = buffer
+        self.load_window(line - WINDOW_LINES // 2)
+        self.scroll_y = 0
+        self.cursor = self.get_cursor_from_index(buffer.line_offset(line) - self.window_start)
+
+    def close_buffer(self):
+        self.buffer = None
+        self.load_window(0)
+
+    def commit(self):
+        """Write edits in the window back into the buffer"""
+        if self.window_dirty:
+            text = self.text
+            self.buffer.replace(self.window_start, self.window_end, text)
+            self.window_end = self.window_start + len(text)
+            self.window_dirty = False
+
+    def load_window(self, first_line):
+        text = ''
+        start = end = 0
+        first_line = max(0, first_line)
+        if self.buffer is not None:
+            total = self.buffer.line_count()
+            first_line = min(first_line, max(0, total - WINDOW_LINES))
+            last_line = first_line + WINDOW_LINES
+            start = self.buffer.line_offset(first_line)
+            # Leave out the newline ending the window, it belongs to the buffer
+            end = self.buffer.line_offset(last_line) - 1 if last_line < total else len(self.buffer)
+            text = self.buffer.text_range(start, end)
+        self.loading = True
+        try:
+            self.text = text
+        finally:
+            self.loading = False
+        self.first_line = first_line
+        self.window_start = start
+        self.window_end = end
+        self.window_dirty = False
+
+    def on_window_text(self, instance, value):
+        if not self.loading:
+            self.window_dirty = True
+            self.dispatch('on_edit')
+
+    def check_window(self, *args):
+        # Move the window once less than a screen of it is left on either side
+        if self.buffer is None:
+            return
+        max_scroll = max(0, self.minimum_height - self.height)
+        if self.scroll_y < self.height and self.first_line > 0:
+            self.move_window()
+        elif self.scroll_y > max_scroll - self.height and self.window_end < len(self.buffer):
+            self.move_window()
+
+    def move_window(self):
+        """Reload the window so the line at the top of the view is in its middle"""
+        self.commit()
+        row_height = self.line_height + self.line_spacing
+        top_index = self.cursor_index((0, int(self.scroll_y / row_height)))
+        top_line = self.first_line + self.text.count('\n', 0, top_index)
+        view_offset = self.scroll_y - int(self.scroll_y / row_height) * row_height
+        cursor_offset = self.window_start + self.cursor_index()
+
+        self.load_window(top_line - WINDOW_LINES // 2)
+
+        top_index = self.buffer.line_offset(top_line) - self.window_start
+        if self.window_start <= cursor_offset <= self.window_end:
+            self.cursor = self.get_cursor_from_index(cursor_offset - self.window_start)
+        else:
+            # The cursor was left behind, bring it along to the top of the view
+            self.cursor = self.get_cursor_from_index(top_index)
+        top_row = self.get_cursor_from_index(top_index)[1]
+        self.scroll_y = top_row * row_height + view_offset
@@ -6,43 +6,54 @@ Version: 2.0
 
 from kivymd.app import MDApp
 from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.list import MDList, ThreeLineAvatarIconListItem, IconLeftWidget, IconRightWidget
+from kivymd.uix.list import ThreeLineAvatarIconListItem, IconLeftWidget, IconRightWidget
 from kivymd.uix.textfield import MDTextField
-from kivymd.uix.button import MDRaisedButton, MDFlatButton, MDIconButton
-from kivymd.uix.dialog import MDDialog
+from kivymd.uix.button import MDRaisedButton
 from kivymd.uix.card import MDCard
 from kivymd.uix.label import MDLabel
 from kivymd.uix.toolbar import MDTopAppBar
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.screenmanager import MDScreenManager
-from kivymd.uix.menu import MDDropdownMenu
-from kivymd.uix.selectioncontrol import MDCheckbox
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.clock import Clock
-from kivy.properties import StringProperty, NumericProperty, BooleanProperty
+from kivy.core.window import Window
 from kivy.metrics import dp
-import json
-import os
-from datetime import datetime
 
-class TodoItem(ThreeLineAvatarIconListItem):
-    """Custom list item for todo tasks"""
+from task_store import TaskStore, task_matches
+from todo_list import TodoList
+from widget_pool import WidgetPool
+
+# Task rows built and handed to the list at a time
+PAGE_SIZE = 100
+
+# todo_list.TodoList storage mode, "shared" lets todo_cli.py and other
+# scripts change the data file while the app is open
+STORAGE_MODE = "shared"
+
+# Seconds between checks for changes other processes saved
+SYNC_INTERVAL = 1.0
+
+# Sort choices in the filter menu, keys are task_store.SORT_ORDERS
+SORT_LABELS = {
+    "list": "Default",
+    "newest": "Newest First",
+    "oldest": "Oldest First",
+    "alpha": "A-Z",
+    "category": "Category",
+    "status": "Active First"
+}
+
+class TodoItem(RecycleDataViewBehavior, ThreeLineAvatarIconListItem):
+    """Custom list item for todo tasks, recycled by TaskListView"""
     
-    def __init__(self, text="", task_id=0, completed=False, category="General", created_at="", **kwargs):
+    def __init__(self, text="", task_id=0, completed=False, category="General", created_at="", selected=False, **kwargs):
         super().__init__(**kwargs)
-        self.text = text
-        self.secondary_text = f"Category: {category}"
-        self.tertiary_text = f"Created: {created_at}"
-        self.task_id = task_id
-        self.category = category
-        self.created_at = created_at
-        self.completed = completed
+        self.index = None
         
         # Add checkbox icon
-        self.checkbox = IconLeftWidget(
-            icon="checkbox-blank-outline" if not completed else "checkbox-marked",
-            theme_text_color="Primary" if not completed else "Hint"
-        )
+        self.checkbox = IconLeftWidget(icon="checkbox-blank-outline")
         self.checkbox.bind(on_release=self.toggle_task)
         self.add_widget(self.checkbox)
         
@@ -54,9 +65,34 @@ class TodoItem(ThreeLineAvatarIconListItem):
         self.delete_btn.bind(on_release=self.delete_task)
         self.add_widget(self.delete_btn)
         
-        # Set initial appearance
-        if completed:
-            self.theme_text_color = "Hint"
+        self.set_task(text, task_id, completed, category, created_at, selected)
+    
+    def set_task(self, text, task_id, completed, category, created_at, selected=False):
+        """Bind this row to a task"""
+        self.text = text
+        self.secondary_text = f"Category: {category}"
+        self.tertiary_text = f"Created: {created_at}"
+        self.task_id = task_id
+        self.category = category
+        self.created_at = created_at
+        self.completed = completed
+        
+        self.checkbox.icon = "checkbox-marked" if completed else "checkbox-blank-outline"
+        self.checkbox.theme_text_color = "Hint" if completed else "Primary"
+        self.theme_text_color = "Hint" if completed else "Primary"
+        self.bg_color = "#C8E6C9" if selected else None
+    
+    def refresh_view_attrs(self, rv, index, data):
+        """Rebind a recycled row to the task at index"""
+        self.index = index
+        self.set_task(
+            data["text"],
+            data["task_id"],
+            data["completed"],
+            data["category"],
+            data["created_at"],
+            data.get("selected", False)
+        )
     
     def toggle_task(self, instance):
         """Toggle task completion"""
@@ -78,9 +114,194 @@ class TodoItem(ThreeLineAvatarIconListItem):
         app.show_delete_dialog(self.task_id, self.text)
     
     def on_release(self):
-        """Edit task on tap"""
+        """Edit task on tap, or select it while picking tasks"""
         app = MDApp.get_running_app()
-        app.show_edit_dialog(self.task_id, self.text, self.category)
+        if app.todo_screen.selection_mode:
+            app.todo_screen.toggle_selected(self.task_id)
+        else:
+            app.show_edit_dialog(self.task_id, self.text, self.category)
+
+class TaskGroupHeader(RecycleDataViewBehavior, MDLabel):
+    """Category heading shown above each group when the list is grouped"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.font_style = "Subtitle2"
+        self.theme_text_color = "Secondary"
+        self.padding = [dp(16), 0]
+    
+    def refresh_view_attrs(self, rv, index, data):
+        """Rebind a recycled heading to a group"""
+        self.text = f"{data['category']} ({data['count']})"
+
+class TaskListView(RecycleView):
+    """Recycling task list that only creates TodoItem rows for what is on screen
+    
+    Rows are loaded a page at a time. While more is set, on_load_more is
+    dispatched once the end of the loaded rows is less than a screen away.
+    """
+    
+    __events__ = ("on_load_more",)
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        
+        layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, dp(88)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            spacing=dp(5),
+            padding=dp(5)
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.add_widget(layout)
+        # The view class lives on the layout manager, so set it after adding one.
+        # Rows carrying a "viewclass" key (group headings) use that class instead
+        self.viewclass = "TodoItem"
+        self.key_viewclass = "viewclass"
+        
+        # task id -> data index, rebuilt after rows are inserted or removed
+        self.positions = None
+        
+        # Whether rows past the loaded ones match the filter
+        self.more = False
+        # Distance scrolled from the top, held while a new page is laid out
+        self.scroll_top = None
+        # Checked on the next frame, once the layout has caught up with the data
+        self.end_trigger = Clock.create_trigger(self.check_end)
+        self.bind(scroll_y=self.end_trigger, height=self.end_trigger)
+        layout.bind(height=self.on_layout_height)
+    
+    @staticmethod
+    def header_row(category, count):
+        """Row data for a group heading"""
+        return {
+            "viewclass": "TaskGroupHeader",
+            "category": category,
+            "count": count,
+            "height": dp(36)
+        }
+    
+    def set_rows(self, rows, more=False):
+        """Replace the row data, only touching rows that changed"""
+        self.positions = None
+        self.more = more
+        self.scroll_top = None
+        if len(rows) != len(self.data):
+            self.data = rows
+            return
+        
+        for index, row in enumerate(rows):
+            if self.data[index] != row:
+                self.data[index] = row
+    
+    def append_rows(self, rows, more):
+        """Add a page of rows after the loaded ones, keeping the scroll position"""
+        self.positions = None
+        self.more = more
+        self.scroll_top = (1 - self.scroll_y) * max(self.children[0].height - self.height, 0)
+        self.data.extend(rows)
+    
+    def on_layout_height(self, layout, height):
+        """Scroll back to where the list was before a page was appended"""
+        if self.scroll_top is not None:
+            hidden = height - self.height
+            self.scroll_y = 1 - self.scroll_top / hidden if hidden > 0 else 1
+            self.scroll_top = None
+        self.end_trigger()
+    
+    def check_end(self, *args):
+        """Ask for the next page once the end of the list is under a screen away"""
+        if not self.more or self.scroll_top is not None:
+            return
+        hidden = self.children[0].height - self.height
+        if hidden <= 0 or self.scroll_y * hidden < self.height:
+            self.more = False
+            self.dispatch("on_load_more")
+    
+    def on_load_more(self):
+        """Dispatched when the next page of rows is wanted"""
+    
+    def task_count(self):
+        """Count the loaded task rows, leaving out headings"""
+        if self.positions is not None:
+            return len(self.positions)
+        return sum(1 for row in self.data if "task_id" in row)
+    
+    def holds(self, key, key_of):
+        """Check a row with key belongs among the loaded rows rather than a later page"""
+        if not self.more:
+            return True
+        for row in reversed(self.data):
+            if "task_id" in row:
+                return key < key_of(row)
+        return False
+    
+    def index_of(self, task_id):
+        """Get the data index of a task's row, or None if it is not shown"""
+        if self.positions is None:
+            self.positions = {
+                row["task_id"]: index
+                for index, row in enumerate(self.data)
+                if "task_id" in row
+            }
+        return self.positions.get(task_id)
+    
+    def search(self, key, key_of):
+        """Get the first index whose row key is not below key, rows being in key order"""
+        low, high = 0, len(self.data)
+        while low < high:
+            middle = (low + high) // 2
+            if key_of(self.data[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def fits(self, index, key, key_of):
+        """Check the row at index can take key and stay in key order"""
+        if index > 0 and key_of(self.data[index - 1]) > key:
+            return False
+        if index + 1 >= len(self.data):
+            # The first row of the next page could belong in front of it
+            return not self.more
+        return key_of(self.data[index + 1]) >= key
+    
+    def insert_row(self, index, row):
+        """Insert a row at index"""
+        self.data.insert(index, row)
+        self.positions = None
+    
+    def remove_row(self, index):
+        """Remove the row at index and return it"""
+        self.positions = None
+        return self.data.pop(index)
+    
+    def group_index(self, category, key_of):
+        """Get the data index of a group's heading, or None if it is not loaded"""
+        index = self.search((category,), key_of)
+        if index < len(self.data):
+            row = self.data[index]
+            if "task_id" not in row and row["category"] == category:
+                return index
+        return None
+    
+    def add_to_group(self, index, change):
+        """Change the count of the heading at index, dropping it when empty"""
+        header = self.data[index]
+        count = header["count"] + change
+        if count:
+            self.data[index] = self.header_row(header["category"], count)
+        else:
+            self.remove_row(index)
+    
+    def set_group_counts(self, counts):
+        """Set the count of every loaded heading from {category: count}"""
+        for index in reversed(range(len(self.data))):
+            header = self.data[index]
+            if "task_id" not in header and header["count"] != counts.get(header["category"], 0):
+                self.add_to_group(index, counts.get(header["category"], 0) - header["count"])
 
 class TodoScreen(MDScreen):
     """Main screen for the todo app"""
@@ -105,11 +326,21 @@ class TodoScreen(MDScreen):
         )
         
         # Add menu buttons
-        self.app_bar.right_action_items = [
+        self.default_actions = [
             ["filter-variant", lambda x: self.show_filter_menu()],
+            ["checkbox-multiple-marked-outline", lambda x: self.start_selection()],
             ["delete-sweep", lambda x: self.clear_completed()],
+            ["swap-vertical", lambda x: MDApp.get_running_app().show_transfer_dialog()],
             ["information", lambda x: self.show_info()]
         ]
+        # Shown instead while picking tasks for a bulk action
+        self.selection_actions = [
+            ["check-all", lambda x: self.bulk_complete()],
+            ["tag-outline", lambda x: self.show_bulk_category_menu()],
+            ["delete", lambda x: self.bulk_delete()],
+            ["close", lambda x: self.end_selection()]
+        ]
+        self.app_bar.right_action_items = self.default_actions
         
         # Filter chips area
         filter_layout = MDBoxLayout(
@@ -215,12 +446,7 @@ class TodoScreen(MDScreen):
         self.search_field.bind(text=self.on_search_text)
         
         # Task list area
-        scroll = ScrollView()
-        self.task_list = MDList(
-            spacing=5,
-            padding=5
-        )
-        scroll.add_widget(self.task_list)
+        self.task_list = TaskListView()
         
         # Add all widgets to screen
         main_layout.add_widget(self.app_bar)
@@ -228,20 +454,31 @@ class TodoScreen(MDScreen):
         main_layout.add_widget(category_card)
         main_layout.add_widget(input_card)
         main_layout.add_widget(self.search_field)
-        main_layout.add_widget(scroll)
+        main_layout.add_widget(self.task_list)
         
         self.add_widget(main_layout)
         
         # Current filter
         self.current_filter = "all"
         self.current_category_filter = "All"
+        self.filter_name = "All Tasks"
+        self.current_sort = "list"
+        self.group_by_category = False
         self.search_text = ""
+        self.pending_search_text = ""
+        
+        # Multi-select state, ids of the picked tasks
+        self.selection_mode = False
+        self.selected = set()
+        
+        # Debounce search so typing quickly refreshes the list once
+        self.search_trigger = Clock.create_trigger(self.apply_search, 0.25)
     
     def add_task_from_input(self, *args):
         """Add task from text input"""
         task_text = self.task_input.text.strip()
-        if task_text:
-            app = MDApp.get_running_app()
+        app = MDApp.get_running_app()
+        if task_text and app.tasks_loaded:
             category = self.category_button.text
             app.add_task(task_text, category)
             self.task_input.text = ""
@@ -260,21 +497,18 @@ class TodoScreen(MDScreen):
     def show_category_menu(self):
         """Show category selection menu"""
         app = MDApp.get_running_app()
-        menu_items = []
         
-        for category in app.categories:
-            menu_items.append({
-                "text": category,
-                "viewclass": "OneLineListItem",
-                "on_release": lambda x=category: self.select_category(x)
-            })
+        def menu_items():
+            return [
+                {
+                    "text": category,
+                    "viewclass": "OneLineListItem",
+                    "on_release": lambda x=category: self.select_category(x)
+                }
+                for category in app.categories
+            ]
         
-        self.category_menu = MDDropdownMenu(
-            caller=self.category_button,
-            items=menu_items,
-            width_mult=4
-        )
-        self.category_menu.open()
+        self.category_menu = app.pool.menu("category", self.category_button, tuple(app.categories), menu_items)
     
     def select_category(self, category):
         """Select a category"""
@@ -282,7 +516,13 @@ class TodoScreen(MDScreen):
         self.category_menu.dismiss()
     
     def show_filter_menu(self):
-        """Show filter menu"""
+        """Show filter menu, rebuilt only when the categories or grouping changed"""
+        app = MDApp.get_running_app()
+        key = (tuple(app.categories), self.group_by_category)
+        self.filter_menu = app.pool.menu("filter", self.app_bar, key, self.filter_menu_items)
+    
+    def filter_menu_items(self):
+        """Items of the filter menu"""
         app = MDApp.get_running_app()
         menu_items = [
             {
@@ -310,12 +550,19 @@ class TodoScreen(MDScreen):
                 "on_release": lambda x=category: self.set_category_filter(x)
             })
         
-        self.filter_menu = MDDropdownMenu(
-            caller=self.app_bar,
-            items=menu_items,
-            width_mult=4
-        )
-        self.filter_menu.open()
+        # Sort and group choices
+        for sort, label in SORT_LABELS.items():
+            menu_items.append({
+                "text": f"Sort: {label}",
+                "viewclass": "OneLineListItem",
+                "on_release": lambda x=sort: self.set_sort(x)
+            })
+        menu_items.append({
+            "text": "Ungroup" if self.group_by_category else "Group by Category",
+            "viewclass": "OneLineListItem",
+            "on_release": self.toggle_grouping
+        })
+        return menu_items
     
     def set_filter(self, filter_type):
         """Set task filter"""
@@ -327,7 +574,8 @@ class TodoScreen(MDScreen):
             "active": "Active Tasks",
             "completed": "Completed Tasks"
         }
-        self.filter_label.text = f"Filter: {filter_names[filter_type]}"
+        self.filter_name = filter_names[filter_type]
+        self.update_filter_label()
         
         app = MDApp.get_running_app()
         app.update_display()
@@ -337,30 +585,263 @@ class TodoScreen(MDScreen):
         """Set category filter"""
         self.current_category_filter = category
         self.current_filter = "all"
-        self.filter_label.text = f"Filter: {category}"
+        self.filter_name = category
+        self.update_filter_label()
+        
+        app = MDApp.get_running_app()
+        app.update_display()
+        self.filter_menu.dismiss()
+    
+    def set_sort(self, sort):
+        """Set the task sort order"""
+        self.current_sort = sort
+        self.update_filter_label()
+        
+        app = MDApp.get_running_app()
+        app.update_display()
+        self.filter_menu.dismiss()
+    
+    def toggle_grouping(self):
+        """Group the list by category, or stop grouping it"""
+        self.group_by_category = not self.group_by_category
+        self.update_filter_label()
         
         app = MDApp.get_running_app()
         app.update_display()
         self.filter_menu.dismiss()
     
+    def update_filter_label(self):
+        """Show the current filter, sort and grouping"""
+        text = f"Filter: {self.filter_name}"
+        if self.current_sort != "list":
+            text += f" | {SORT_LABELS[self.current_sort]}"
+        if self.group_by_category:
+            text += " | Grouped"
+        self.filter_label.text = text
+    
     def on_search_text(self, instance, value):
         """Handle search text change"""
-        self.search_text = value.lower()
+        self.pending_search_text = value.lower()
+        self.search_trigger.cancel()
+        self.search_trigger()
+    
+    def apply_search(self, *args):
+        """Apply the search once typing has paused"""
+        self.search_text = self.pending_search_text
         app = MDApp.get_running_app()
         app.update_display()
+    
+    def start_selection(self):
+        """Start picking tasks for a bulk action"""
+        self.selection_mode = True
+        self.app_bar.right_action_items = self.selection_actions
+        self.update_selection_title()
+    
+    def end_selection(self):
+        """Stop picking tasks and clear the selection"""
+        selected = self.selected
+        self.selected = set()
+        for task_id in selected:
+            self.mark_selected(task_id, False)
+        self.selection_mode = False
+        self.app_bar.title = "Phenry Todo List"
+        self.app_bar.right_action_items = self.default_actions
+    
+    def toggle_selected(self, task_id):
+        """Add a task to the selection or take it out"""
+        if task_id in self.selected:
+            self.selected.discard(task_id)
+        else:
+            self.selected.add(task_id)
+        self.mark_selected(task_id, task_id in self.selected)
+        self.update_selection_title()
+    
+    def mark_selected(self, task_id, selected):
+        """Patch the highlight of one task row"""
+        index = self.task_list.index_of(task_id)
+        if index is not None:
+            self.task_list.data[index] = dict(self.task_list.data[index], selected=selected)
+    
+    def update_selection_title(self):
+        """Show how many tasks are picked"""
+        self.app_bar.title = f"{len(self.selected)} selected"
+    
+    def take_selection(self):
+        """End selection mode and return the picked task ids in list order"""
+        task_ids = sorted(self.selected)
+        self.end_selection()
+        return task_ids
+    
+    def bulk_complete(self):
+        """Mark every picked task as completed"""
+        task_ids = self.take_selection()
+        if task_ids:
+            MDApp.get_running_app().complete_tasks(task_ids)
+    
+    def show_bulk_category_menu(self):
+        """Pick a category for every selected task"""
+        if not self.selected:
+            return
+        app = MDApp.get_running_app()
+        
+        def menu_items():
+            return [
+                {
+                    "text": category,
+                    "viewclass": "OneLineListItem",
+                    "on_release": lambda x=category: self.bulk_recategorize(x)
+                }
+                for category in app.categories
+            ]
+        
+        self.bulk_category_menu = app.pool.menu("bulk_category", self.app_bar, tuple(app.categories), menu_items)
+    
+    def bulk_recategorize(self, category):
+        """Move every picked task to a category"""
+        self.bulk_category_menu.dismiss()
+        MDApp.get_running_app().recategorize_tasks(self.take_selection(), category)
+    
+    def bulk_delete(self):
+        """Ask before deleting every picked task"""
+        if self.selected:
+            MDApp.get_running_app().show_bulk_delete_dialog(sorted(self.selected))
+    
+    def on_task_added(self, app, task):
+        """Show a new task if it passes the current filter"""
+        self.place_task(app, task)
+        self.update_stats(app)
+    
+    def on_task_changed(self, app, task):
+        """Patch, move, show or hide the row of a changed task"""
+        loaded = self.task_list.index_of(task.id) is not None
+        self.place_task(app, task)
+        if self.group_by_category and not loaded and self.task_list.more:
+            # A task on a later page may or may not have been counted in its
+            # heading before the change, so count the groups again
+            self.task_list.set_group_counts(self.group_counts(app))
+        self.update_stats(app)
+    
+    def on_task_removed(self, app, task):
+        """Drop the row of a removed task"""
+        self.selected.discard(task.id)
+        task_list = self.task_list
+        index = task_list.index_of(task.id)
+        if index is not None:
+            self.remove_task_row(app, index)
+        elif self.group_by_category and self.shows(task):
+            # On a later page, but counted in its heading
+            header = task_list.group_index(task.category, self.row_key_function(app))
+            if header is not None:
+                task_list.add_to_group(header, -1)
+        self.update_stats(app)
+    
+    def shows(self, task):
+        """Check a task passes the current filter and search"""
+        return task_matches(task, self.current_filter, self.current_category_filter, self.search_text)
+    
+    def group_counts(self, app):
+        """Count the tasks passing the current filter and search in each category"""
+        return app.store.category_counts(self.current_filter, self.current_category_filter, self.search_text)
+    
+    def place_task(self, app, task):
+        """Apply the smallest list change that brings a task's row up to date
+        
+        A row still in sort order is patched in place, otherwise it is
+        removed and, if the task still passes the filter, inserted where the
+        sort order puts it. A task sorting past the loaded rows is left for
+        a later page, only its group heading counts it.
+        """
+        task_list = self.task_list
+        shown = self.shows(task)
+        key = app.store.sort_key(task, self.current_sort, self.group_by_category)
+        key_of = self.row_key_function(app)
+        row = app.task_row(task)
+        
+        index = task_list.index_of(task.id)
+        if index is not None:
+            old_row = task_list.data[index]
+            same_group = not self.group_by_category or old_row["category"] == row["category"]
+            if shown and same_group and task_list.fits(index, key, key_of):
+                task_list.data[index] = row
+                return
+            self.remove_task_row(app, index)
+        if not shown:
+            return
+        if not task_list.holds(key, key_of):
+            if self.group_by_category:
+                header = task_list.group_index(task.category, key_of)
+                if header is not None:
+                    task_list.add_to_group(header, 1)
+            return
+        
+        index = task_list.search(key, key_of)
+        if self.group_by_category:
+            if index == 0 or task_list.data[index - 1]["category"] != task.category:
+                task_list.insert_row(index, task_list.header_row(task.category, 0))
+                index += 1
+            task_list.add_to_group(task_list.group_index(task.category, key_of), 1)
+        task_list.insert_row(index, row)
+    
+    def remove_task_row(self, app, index):
+        """Remove a task row, and its heading if it was the last in its group"""
+        row = self.task_list.remove_row(index)
+        if self.group_by_category:
+            key_of = self.row_key_function(app)
+            self.task_list.add_to_group(self.task_list.group_index(row["category"], key_of), -1)
+    
+    def row_key_function(self, app):
+        """Get a function giving the sort key of a row, headings sorting first in their group"""
+        store = app.store
+        sort = self.current_sort
+        group = self.group_by_category
+        
+        def key_of(row):
+            if "task_id" not in row:
+                return (row["category"],)
+            return store.sort_key(store.get(row["task_id"]), sort, group)
+        
+        return key_of
+    
+    def update_stats(self, app):
+        """Show the store's task counts"""
+        total, active, completed = app.store.stats()
+        self.stats_label.text = f"{total} tasks | {active} active | {completed} done"
 
 class TodoApp(MDApp):
-    """Main application class"""
+    """Main application class
+    
+    The tasks live in a TodoList (todo_list.py), which todo_cli.py also
+    drives without Kivy. Single task changes are announced with the on_task_added,
+    on_task_changed and on_task_removed events, which TodoScreen turns
+    into row patches. Changes to the filter or to many tasks at once
+    rebuild the list with update_display. Changes made inside a batch()
+    block are saved together and redrawn once when it ends.
+    """
+    
+    __events__ = ("on_task_added", "on_task_changed", "on_task_removed")
     
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.tasks = []
-        self.next_id = 1
-        self.data_file = "todo_data.json"
-        self.categories = ["General", "Work", "Personal", "Shopping", "Health", "Study"]
+        self.todo = TodoList(storage_mode=STORAGE_MODE, on_change=self.dispatch, on_refresh=self.update_display)
         
-        # Load saved tasks
-        self.load_tasks()
+        # Dialogs and menus, built on first use
+        self.pool = WidgetPool()
+        # What the pooled delete and edit dialogs act on
+        self.delete_target = None
+        self.edit_target = None
+        self.edit_text_field = None
+        self.edit_category_button = None
+        
+        # Tasks are loaded after the first frame, see on_start
+        self.tasks_loaded = False
+    
+    @property
+    def store(self):
+        return self.todo.store
+    
+    @property
+    def categories(self):
+        return self.todo.categories
     
     def build(self):
         """Build the application"""
@@ -374,123 +855,197 @@ class TodoApp(MDApp):
         # Add todo screen
         self.todo_screen = TodoScreen()
         self.screen_manager.add_widget(self.todo_screen)
+        self.todo_screen.task_list.bind(on_load_more=self.load_more_tasks)
+        self.bind(
+            on_task_added=self.todo_screen.on_task_added,
+            on_task_changed=self.todo_screen.on_task_changed,
+            on_task_removed=self.todo_screen.on_task_removed
+        )
         
         return self.screen_manager
     
     def on_start(self):
         """Called when app starts"""
+        # Let the first frame draw the screen before reading the data file
+        Window.bind(on_flip=self.on_first_frame)
+    
+    def on_first_frame(self, *args):
+        """Show the first page of tasks once the first frame is on screen"""
+        Window.unbind(on_flip=self.on_first_frame)
+        Clock.schedule_once(self.show_first_tasks)
+    
+    def show_first_tasks(self, *args):
+        """Show the first page of saved tasks, read without loading the rest"""
+        try:
+            tasks = self.todo.storage.load_first(PAGE_SIZE)
+        except Exception as e:
+            print(f"Error reading tasks: {e}")
+            tasks = None
+        if not tasks:
+            self.load_initial_tasks()
+            return
+        # The screen starts unfiltered in list order, so these are its first rows
+        self.todo_screen.task_list.set_rows([self.task_row(task) for task in tasks], False)
+        Window.bind(on_flip=self.on_first_page)
+    
+    def on_first_page(self, *args):
+        """Load the rest of the tasks once the first page is on screen"""
+        Window.unbind(on_flip=self.on_first_page)
+        Clock.schedule_once(self.load_initial_tasks)
+    
+    def load_initial_tasks(self, *args):
+        """Load saved tasks and show them"""
+        self.load_tasks()
+        self.tasks_loaded = True
         self.update_display()
+        if self.todo.storage.shared:
+            Clock.schedule_interval(self.sync_tasks, SYNC_INTERVAL)
+    
+    def sync_tasks(self, *args):
+        """Merge in tasks other processes saved, only their rows are updated"""
+        self.todo.sync()
     
     def add_task(self, text, category="General"):
         """Add a new task"""
-        if text:
-            task = {
-                "id": self.next_id,
-                "text": text,
-                "completed": False,
-                "category": category,
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
-            self.tasks.append(task)
-            self.next_id += 1
-            self.save_tasks()
-            self.update_display()
+        self.todo.add_task(text, category)
     
     def toggle_task_completion(self, task_id):
         """Toggle task completion status"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task["completed"] = not task["completed"]
-                break
-        self.save_tasks()
-        self.update_display()
+        self.todo.toggle_task_completion(task_id)
     
     def delete_task(self, task_id):
         """Delete a task"""
-        self.tasks = [task for task in self.tasks if task["id"] != task_id]
-        self.save_tasks()
-        self.update_display()
+        self.todo.delete_task(task_id)
     
     def edit_task(self, task_id, new_text, new_category):
         """Edit an existing task"""
-        for task in self.tasks:
-            if task["id"] == task_id:
-                task["text"] = new_text
-                task["category"] = new_category
-                break
-        self.save_tasks()
-        self.update_display()
+        self.todo.edit_task(task_id, new_text, new_category)
+    
+    def complete_tasks(self, task_ids, completed=True):
+        """Set the completion status of many tasks with one save"""
+        self.todo.complete_tasks(task_ids, completed)
+    
+    def recategorize_tasks(self, task_ids, category):
+        """Move many tasks to a category with one save"""
+        self.todo.recategorize_tasks(task_ids, category)
+    
+    def delete_tasks(self, task_ids):
+        """Delete many tasks with one save"""
+        self.todo.delete_tasks(task_ids)
+    
+    def batch(self):
+        """Group task changes into one save and one list refresh, see TodoList.batch"""
+        return self.todo.batch()
+    
+    def on_task_added(self, task):
+        """Dispatched after a task is added"""
+    
+    def on_task_changed(self, task):
+        """Dispatched after a task is toggled or edited"""
+    
+    def on_task_removed(self, task):
+        """Dispatched after a task is deleted"""
     
     def clear_completed_tasks(self):
         """Clear all completed tasks"""
-        self.tasks = [task for task in self.tasks if not task["completed"]]
-        self.save_tasks()
-        self.update_display()
+        self.todo.clear_completed_tasks()
     
     def update_display(self):
-        """Update the task list display"""
+        """Show the first page of the task list"""
         screen = self.todo_screen
-        screen.task_list.clear_widgets()
-        
-        # Filter tasks
-        filtered_tasks = self.get_filtered_tasks()
-        
-        # Add tasks to list
-        for task in filtered_tasks:
-            item = TodoItem(
-                text=task["text"],
-                task_id=task["id"],
-                completed=task["completed"],
-                category=task.get("category", "General"),
-                created_at=task.get("created_at", "")
-            )
-            
-            screen.task_list.add_widget(item)
+        rows, more = self.page_rows(self.get_filtered_tasks(PAGE_SIZE + 1))
         
-        # Update stats
-        total = len(self.tasks)
-        completed = len([t for t in self.tasks if t["completed"]])
-        active = total - completed
-        screen.stats_label.text = f"{total} tasks | {active} active | {completed} done"
+        # Hand the rows to the recycle view, which only builds visible items
+        screen.task_list.set_rows(rows, more)
+        
+        # Update stats from the store's counters
+        screen.update_stats(self)
+    
+    def load_more_tasks(self, *args):
+        """Append the next page of the task list"""
+        task_list = self.todo_screen.task_list
+        tasks = self.get_filtered_tasks(PAGE_SIZE + 1, task_list.task_count())
+        last = task_list.data[-1] if task_list.data else None
+        rows, more = self.page_rows(tasks, last["category"] if last else None)
+        task_list.append_rows(rows, more)
     
-    def get_filtered_tasks(self):
+    def page_rows(self, tasks, last_category=None):
+        """Get (rows, more) for a page fetched with one task past PAGE_SIZE
+        
+        last_category is the category of the row the page follows, so a
+        group carried over from the last page gets no second heading.
+        """
+        more = len(tasks) > PAGE_SIZE
+        rows = [self.task_row(task) for task in tasks[:PAGE_SIZE]]
+        if self.todo_screen.group_by_category:
+            rows = self.group_rows(rows, self.todo_screen.group_counts(self), last_category)
+        return rows, more
+    
+    def task_row(self, task):
+        """Row data for a task"""
+        return {
+            "text": task.text,
+            "task_id": task.id,
+            "completed": task.completed,
+            "category": task.category,
+            "created_at": task.created_at,
+            "selected": task.id in self.todo_screen.selected
+        }
+    
+    def group_rows(self, rows, counts, last_category=None):
+        """Put a heading row above each category in rows sorted by category"""
+        grouped = []
+        category = last_category
+        for row in rows:
+            if row["category"] != category:
+                category = row["category"]
+                grouped.append(TaskListView.header_row(category, counts.get(category, 0)))
+            grouped.append(row)
+        return grouped
+    
+    def get_filtered_tasks(self, limit=None, offset=0):
         """Get filtered tasks based on current filter"""
         screen = self.todo_screen
-        filtered = self.tasks
-        
-        # Apply completion filter
-        if screen.current_filter == "active":
-            filtered = [t for t in filtered if not t["completed"]]
-        elif screen.current_filter == "completed":
-            filtered = [t for t in filtered if t["completed"]]
         
-        # Apply category filter
-        if screen.current_category_filter != "All":
-            filtered = [t for t in filtered if t.get("category", "General") == screen.current_category_filter]
-        
-        # Apply search filter
-        if screen.search_text:
-            filtered = [t for t in filtered if screen.search_text in t["text"].lower()]
-        
-        return filtered
+        # The store filters and sorts from its table (or in SQL) and narrows the last search
+        return self.store.query(
+            screen.current_filter,
+            screen.current_category_filter,
+            screen.search_text,
+            limit,
+            offset,
+            screen.current_sort,
+            screen.group_by_category
+        )
     
     def show_delete_dialog(self, task_id, task_text):
         """Show delete confirmation dialog"""
-        dialog = MDDialog(
-            title="Delete Task?",
-            text=f"Delete '{task_text[:50]}...'?" if len(task_text) > 50 else f"Delete '{task_text}'?",
-            buttons=[
-                MDFlatButton(
-                    text="CANCEL",
-                    on_release=lambda x: dialog.dismiss()
-                ),
-                MDRaisedButton(
-                    text="DELETE",
-                    md_bg_color="#F44336",
-                    on_release=lambda x: self.confirm_delete(task_id, dialog)
-                )
-            ]
-        )
+        from kivymd.uix.button import MDFlatButton
+        from kivymd.uix.dialog import MDDialog
+        
+        text = f"Delete '{task_text[:50]}...'?" if len(task_text) > 50 else f"Delete '{task_text}'?"
+        
+        def build():
+            dialog = MDDialog(
+                title="Delete Task?",
+                text=text,
+                buttons=[
+                    MDFlatButton(
+                        text="CANCEL",
+                        on_release=lambda x: dialog.dismiss()
+                    ),
+                    MDRaisedButton(
+                        text="DELETE",
+                        md_bg_color="#F44336",
+                        on_release=lambda x: self.confirm_delete(self.delete_target, dialog)
+                    )
+                ]
+            )
+            return dialog
+        
+        dialog = self.pool.dialog("delete", build)
+        dialog.text = text
+        self.delete_target = task_id
         dialog.open()
     
     def confirm_delete(self, task_id, dialog):
@@ -498,8 +1053,53 @@ class TodoApp(MDApp):
         self.delete_task(task_id)
         dialog.dismiss()
     
+    def show_bulk_delete_dialog(self, task_ids):
+        """Show delete confirmation dialog for the selected tasks"""
+        from kivymd.uix.button import MDFlatButton
+        from kivymd.uix.dialog import MDDialog
+        
+        text = f"Delete {len(task_ids)} selected task{'s' if len(task_ids) != 1 else ''}?"
+        
+        def build():
+            dialog = MDDialog(
+                title="Delete Tasks?",
+                text=text,
+                buttons=[
+                    MDFlatButton(
+                        text="CANCEL",
+                        on_release=lambda x: dialog.dismiss()
+                    ),
+                    MDRaisedButton(
+                        text="DELETE",
+                        md_bg_color="#F44336",
+                        on_release=lambda x: self.confirm_bulk_delete(dialog)
+                    )
+                ]
+            )
+            return dialog
+        
+        dialog = self.pool.dialog("bulk_delete", build)
+        dialog.text = text
+        dialog.open()
+    
+    def confirm_bulk_delete(self, dialog):
+        """Confirm and delete the selected tasks"""
+        self.delete_tasks(self.todo_screen.take_selection())
+        dialog.dismiss()
+    
     def show_edit_dialog(self, task_id, current_text, current_category):
         """Show edit task dialog"""
+        dialog = self.pool.dialog("edit", self.build_edit_dialog)
+        self.edit_target = task_id
+        self.edit_text_field.text = current_text
+        self.edit_category_button.text = current_category
+        dialog.open()
+    
+    def build_edit_dialog(self):
+        """Build the edit dialog, its SAVE button acts on edit_target"""
+        from kivymd.uix.button import MDFlatButton
+        from kivymd.uix.dialog import MDDialog
+        
         content = MDBoxLayout(
             orientation="vertical",
             spacing=20,
@@ -509,40 +1109,38 @@ class TodoApp(MDApp):
         )
         
         text_field = MDTextField(
-            text=current_text,
             hint_text="Task text",
             mode="rectangle"
         )
         
         category_button = MDRaisedButton(
-            text=current_category,
             size_hint_x=1,
             md_bg_color="#2196F3"
         )
         
         def show_cat_menu():
-            menu_items = []
-            for cat in self.categories:
-                menu_items.append({
-                    "text": cat,
-                    "viewclass": "OneLineListItem",
-                    "on_release": lambda x=cat: select_cat(x)
-                })
+            def menu_items():
+                return [
+                    {
+                        "text": cat,
+                        "viewclass": "OneLineListItem",
+                        "on_release": lambda x=cat: select_cat(x)
+                    }
+                    for cat in self.categories
+                ]
             
-            cat_menu = MDDropdownMenu(
-                caller=category_button,
-                items=menu_items,
-                width_mult=4
-            )
-            cat_menu.open()
+            self.pool.menu("edit_category", category_button, tuple(self.categories), menu_items)
         
         def select_cat(cat):
             category_button.text = cat
+            self.pool.dismiss("edit_category")
         
         category_button.bind(on_release=lambda x: show_cat_menu())
         
         content.add_widget(text_field)
         content.add_widget(category_button)
+        self.edit_text_field = text_field
+        self.edit_category_button = category_button
         
         dialog = MDDialog(
             title="Edit Task",
@@ -556,11 +1154,13 @@ class TodoApp(MDApp):
                 MDRaisedButton(
                     text="SAVE",
                     md_bg_color="#4CAF50",
-                    on_release=lambda x: self.confirm_edit(task_id, text_field.text, category_button.text, dialog)
+                    on_release=lambda x: self.confirm_edit(
+                        self.edit_target, text_field.text, category_button.text, dialog
+                    )
                 )
             ]
         )
-        dialog.open()
+        return dialog
     
     def confirm_edit(self, task_id, new_text, new_category, dialog):
         """Confirm and edit task"""
@@ -568,8 +1168,92 @@ class TodoApp(MDApp):
             self.edit_task(task_id, new_text.strip(), new_category)
         dialog.dismiss()
     
+    def import_tasks(self, path):
+        """Add or update tasks from a JSON Lines or CSV file, see TodoList.import_tasks"""
+        return self.todo.import_tasks(path)
+    
+    def export_tasks(self, path):
+        """Write every task to a JSON Lines or CSV file and return the count"""
+        return self.todo.export_tasks(path)
+    
+    def show_transfer_dialog(self):
+        """Ask for a file to import tasks from or export them to"""
+        from kivymd.uix.button import MDFlatButton
+        from kivymd.uix.dialog import MDDialog
+        
+        if not self.tasks_loaded:
+            return
+        
+        def build():
+            # The file name typed last time is kept for the next use
+            path_field = MDTextField(
+                text="tasks.csv",
+                hint_text="File (.csv or .jsonl)",
+                mode="rectangle"
+            )
+            dialog = MDDialog(
+                title="Import / Export Tasks",
+                type="custom",
+                content_cls=path_field,
+                buttons=[
+                    MDFlatButton(
+                        text="CANCEL",
+                        on_release=lambda x: dialog.dismiss()
+                    ),
+                    MDFlatButton(
+                        text="EXPORT",
+                        on_release=lambda x: self.confirm_transfer(dialog, path_field.text.strip(), False)
+                    ),
+                    MDRaisedButton(
+                        text="IMPORT",
+                        md_bg_color="#4CAF50",
+                        on_release=lambda x: self.confirm_transfer(dialog, path_field.text.strip(), True)
+                    )
+                ]
+            )
+            return dialog
+        
+        self.pool.dialog("transfer", build).open()
+    
+    def confirm_transfer(self, dialog, path, importing):
+        """Run the import or export and report how it went"""
+        dialog.dismiss()
+        try:
+            if importing:
+                message = self.import_tasks(path).summary("tasks")
+            else:
+                message = f"{self.export_tasks(path)} tasks written to {path}"
+        except (OSError, ValueError) as e:
+            message = f"Could not {'import' if importing else 'export'} {path}: {e}"
+        self.show_message_dialog("Import" if importing else "Export", message)
+    
+    def show_message_dialog(self, title, text):
+        """Show a message with an OK button"""
+        from kivymd.uix.dialog import MDDialog
+        
+        def build():
+            message_dialog = MDDialog(
+                title=title,
+                text=text,
+                buttons=[
+                    MDRaisedButton(
+                        text="OK",
+                        md_bg_color="#4CAF50",
+                        on_release=lambda x: message_dialog.dismiss()
+                    )
+                ]
+            )
+            return message_dialog
+        
+        message_dialog = self.pool.dialog("message", build)
+        message_dialog.title = title
+        message_dialog.text = text
+        message_dialog.open()
+    
     def show_info_dialog(self):
         """Show information about the app"""
+        from kivymd.uix.dialog import MDDialog
+        
         info_text = """Todo App v2.0 - Enhanced
 
 Features:
@@ -577,8 +1261,11 @@ Features:
 • Mark tasks as complete
 • Categorize tasks
 • Filter by status or category
+• Sort and group by category
 • Search tasks
+• Select several tasks to complete, move or delete them
 • Clear completed tasks
+• Import and export CSV or JSON Lines files
 • Persistent data storage
 
 Tap any task to edit it.
@@ -586,50 +1273,39 @@ Use the filter menu for quick views.
 
 Built with KivyMD by Phenry Dsolemn"""
         
-        info_dialog = MDDialog(
-            title="About Todo App",
-            text=info_text,
-            buttons=[
-                MDRaisedButton(
-                    text="OK",
-                    md_bg_color="#4CAF50",
-                    on_release=lambda x: info_dialog.dismiss()
-                )
-            ]
-        )
-        info_dialog.open()
+        def build():
+            info_dialog = MDDialog(
+                title="About Todo App",
+                text=info_text,
+                buttons=[
+                    MDRaisedButton(
+                        text="OK",
+                        md_bg_color="#4CAF50",
+                        on_release=lambda x: info_dialog.dismiss()
+                    )
+                ]
+            )
+            return info_dialog
+        
+        self.pool.dialog("info", build).open()
     
-    def save_tasks(self):
-        """Save tasks to JSON file"""
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump({
-                    "tasks": self.tasks,
-                    "next_id": self.next_id,
-                    "categories": self.categories
-                }, f, indent=2)
-        except Exception as e:
-            print(f"Error saving tasks: {e}")
+    def save_tasks(self, changed=(), removed=()):
+        """Save tasks, passing only the changed and removed ones when known"""
+        self.todo.save(changed, removed)
     
     def load_tasks(self):
-        """Load tasks from JSON file"""
+        """Load tasks from storage"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.tasks = data.get("tasks", [])
-                    self.next_id = data.get("next_id", 1)
-                    saved_categories = data.get("categories", [])
-                    if saved_categories:
-                        self.categories = saved_categories
+            self.todo.load()
         except Exception as e:
             print(f"Error loading tasks: {e}")
-            self.tasks = []
-            self.next_id = 1
+            self.todo.store = TaskStore()
+            self.todo.next_id = 1
     
     def on_stop(self):
         """Called when app stops"""
-        self.save_tasks()
+        if self.tasks_loaded:
+            self.todo.close()
 
 if __name__ == '__main__':
     TodoApp().run()
\ No newline at end of file
@@ -0,0 +1,171 @@
+import bisect
+import json
+import math
+import os
+import re
+import zlib
+from collections import Counter
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Title words count this many times more than content words
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def note_stamp(note):
+    # Cheap fingerprint used to spot notes that changed since the index was saved,
+    # built from the body hash kept in the manifest so no body has to be read
+    return zlib.crc32(note.title.encode('utf-8'), note.hash or 0)
+
+
+def note_terms(note, content):
+    terms = Counter(tokenize(content))
+    for token in tokenize(note.title):
+        terms[token] += TITLE_WEIGHT
+    return dict(terms)
+
+
+class NoteIndex:
+    """Inverted index of note title and content tokens, keyed by note id.
+
+    Notes are ranked newest first on ties, by the order they were indexed
+    in, so editing or deleting a note only touches its own entry.
+    """
+
+    def __init__(self):
+        self.stamps = {}
+        self.terms = {}
+        self.postings = {}
+        # note id -> position in the notes list, used to break ties
+        self.order = {}
+        self.next_order = 0
+        self.vocabulary = []
+        self.vocabulary_dirty = False
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path, notes, get_content):
+        # Read the saved index and bring it in line with the notes
+        index = cls()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                docs = data.get('docs', {})
+                # Indexes saved before notes had ids are rebuilt
+                if isinstance(docs, dict):
+                    for note_id, (stamp, terms) in docs.items():
+                        index._post(note_id, stamp, terms)
+            except Exception as e:
+                print(f"Error loading search index: {e}")
+                index = cls()
+        index.sync(notes, get_content)
+        return index
+
+    def save(self, path):
+        docs = {note_id: [stamp, self.terms[note_id]] for note_id, stamp in self.stamps.items()}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'docs': docs}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    def sync(self, notes, get_content):
+        # Reindex only the notes whose fingerprint no longer matches and drop
+        # the ones that are gone, get_content(note) reads the body of a note
+        self.order = {}
+        for position, note in enumerate(notes):
+            self.order[note.id] = position
+            if self.stamps.get(note.id) != note_stamp(note):
+                self.replace(note, get_content(note))
+        self.next_order = len(self.order)
+        for note_id in [note_id for note_id in self.stamps if note_id not in self.order]:
+            self._unpost(note_id)
+            self.dirty = True
+
+    def add(self, note, content):
+        self.order[note.id] = self.next_order
+        self.next_order += 1
+        self.replace(note, content)
+
+    def replace(self, note, content):
+        if note.id in self.stamps:
+            self._unpost(note.id)
+        self._post(note.id, note_stamp(note), note_terms(note, content))
+        self.dirty = True
+
+    def remove(self, note_id):
+        self._unpost(note_id)
+        self.order.pop(note_id, None)
+        self.dirty = True
+
+    def search(self, query):
+        """Return the ids of the notes matching every query word, best first.
+
+        Each query word matches any indexed word it is a prefix of, with
+        exact matches and rarer words scoring higher.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        total = len(self.stamps)
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term in self._expand(token):
+                docs = self.postings[term]
+                weight = math.log(1 + total / len(docs))
+                if term != token:
+                    weight /= 2
+                for note_id, count in docs.items():
+                    token_scores[note_id] = token_scores.get(note_id, 0) + count * weight
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    note_id: score + token_scores[note_id]
+                    for note_id, score in scores.items()
+                    if note_id in token_scores
+                }
+            if not scores:
+                return []
+
+        # Best score first, newest note first on ties
+        order = self.order
+        return sorted(scores, key=lambda note_id: (-scores[note_id], -order.get(note_id, -1)))
+
+    def _expand(self, prefix):
+        if self.vocabulary_dirty:
+            self.vocabulary = sorted(self.postings)
+            self.vocabulary_dirty = False
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        matches = []
+        for term in self.vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def _post(self, note_id, stamp, terms):
+        self.stamps[note_id] = stamp
+        self.terms[note_id] = terms
+        for term, count in terms.items():
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = {}
+                self.vocabulary_dirty = True
+            docs[note_id] = count
+
+    def _unpost(self, note_id):
+        del self.stamps[note_id]
+        for term in self.terms.pop(note_id):
+            docs = self.postings[term]
+            del docs[note_id]
+            if not docs:
+                del self.postings[term]
+                self.vocabulary_dirty = True
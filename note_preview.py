@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from functools import lru_cache
+
+from kivy.core.text.markup import MarkupLabel
+from kivy.utils import get_color_from_hex
+from kivymd.uix.label import MDLabel
+
+# Rendered card texts kept for reuse, a few screens of cards
+TEXTURE_CACHE_SIZE = 300
+
+
+@lru_cache(maxsize=None)
+def parse_color(color):
+    # Only a handful of note colors are ever used. Color properties copy
+    # the list they are given, so the cached one is never changed
+    return get_color_from_hex(color)
+
+
+class TextureCache:
+    """Core labels by text and render options, least recently used dropped first"""
+
+    def __init__(self, size=TEXTURE_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        core = self.entries.get(key)
+        if core is not None:
+            self.entries.move_to_end(key)
+        return core
+
+    def put(self, key, core):
+        self.entries[key] = core
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+texture_cache = TextureCache()
+
+
+class PreviewLabel(MDLabel):
+    """MDLabel that shows textures from texture_cache instead of rendering its own.
+
+    Recycled note cards keep showing the same few titles and snippets at
+    the same widths, so most refreshes find their text already rendered.
+    Each cache entry has a core label of its own that only ever renders
+    that text, so any number of labels can share its texture and it is
+    redrawn correctly when the GL context is rebuilt.
+    """
+
+    def texture_update(self, *largs):
+        label = self._label
+        if (isinstance(label, MarkupLabel) or not label.text or
+                (self.halign == 'justify' or self.strip) and not label.text.strip()):
+            super().texture_update(*largs)
+            return
+
+        # The box the text is fitted into is kept apart from the other options
+        options = label.options
+        text_size = tuple(label.text_size)
+        key = (label.text, text_size, repr(sorted(item for item in options.items() if item[0] != 'text')))
+        core = texture_cache.get(key)
+        if core is None:
+            core = label.__class__(**dict(options, text=label.text))
+            core.text_size = text_size
+            core.refresh()
+            texture_cache.put(key, core)
+        self.texture = core.texture
+        self.texture_size = list(core.texture.size)
+        self.is_shortened = core.is_shortened
@@ -0,0 +1,384 @@
+import json
+import os
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+
+from file_lock import acquire_lock, file_identity
+from records import Note, encode_record, notes_from_dicts
+from text_buffer import CHUNK_CHARS, PieceTable
+
+# Saves arriving within this many seconds of each other become one write
+COALESCE_DELAY = 0.2
+
+# Preview kept in the manifest for the note cards
+SNIPPET_LINES = 4
+SNIPPET_CHARS = 200
+
+# Bytes read from the end of the manifest at first when only its last notes are wanted
+TAIL_CHUNK = 1 << 16
+
+
+def write_atomic(path, text):
+    # text is a string or an iterable of string chunks
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if isinstance(text, str):
+            f.write(text)
+        else:
+            f.writelines(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data, **kwargs):
+    write_atomic(path, json.dumps(data, **kwargs))
+
+
+def content_hash(content):
+    # The same value for a string and for a PieceTable holding it
+    if isinstance(content, str):
+        return zlib.crc32(content.encode('utf-8'))
+    crc = 0
+    for chunk in content.chunks():
+        crc = zlib.crc32(chunk.encode('utf-8'), crc)
+    return crc
+
+
+def read_last_items(path, limit):
+    """Decode up to the last limit items of a JSON list file, reading it from the end
+
+    The items come back in file order. None when the end of the file does
+    not parse as a list of objects.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        tail_size = TAIL_CHUNK
+        while True:
+            tail_size = min(tail_size, size)
+            f.seek(size - tail_size)
+            # A character cut in two at the start is never part of a whole item
+            text = f.read(tail_size).decode('utf-8', 'replace')
+            items = []
+            end = len(text.rstrip())
+            if not text.endswith(']', 0, end):
+                return None
+            end = len(text[:end - 1].rstrip())
+            while len(items) < limit and not text.endswith('[', 0, end):
+                # Find where the item ending at end starts, trying each { back from it
+                start = text.rfind('{', 0, end)
+                while start >= 0:
+                    try:
+                        item, item_end = decoder.raw_decode(text, start)
+                    except ValueError:
+                        item_end = None
+                    before = text[:start].rstrip()
+                    if item_end == end and isinstance(item, dict) and before.endswith((',', '[')):
+                        break
+                    start = text.rfind('{', 0, start)
+                if start < 0:
+                    break
+                items.append(item)
+                end = len(before[:-1].rstrip()) if before.endswith(',') else len(before)
+            else:
+                items.reverse()
+                return items
+            if tail_size == size:
+                return None
+            tail_size *= 4
+
+
+def new_note_id():
+    return uuid.uuid4().hex
+
+
+def make_snippet(content):
+    lines = content.split('\n', SNIPPET_LINES)[:SNIPPET_LINES]
+    return '\n'.join(lines)[:SNIPPET_CHARS]
+
+
+class NotesWriter:
+    """Writes notes.json on a background thread.
+
+    save() only records the latest notes list and wakes the writer, so a
+    burst of saves turns into a single write of the newest state. Other
+    files can ride along, they are written before the notes list and
+    deleted after it. Errors are passed to on_error from the writer thread.
+
+    With a lock_path, each write holds that lock file and the notes list is
+    written by write_manifest(notes, updated, removed), given the notes
+    saved and the ids dropped since the last write.
+    """
+
+    def __init__(self, path, on_error=None, lock_path=None, write_manifest=None):
+        self.path = path
+        self.on_error = on_error
+        self.lock_path = lock_path
+        self.write_manifest = write_manifest or self._write_manifest
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.pending = None
+        # path -> text to write, or None to delete
+        self.pending_files = {}
+        # id -> note saved, and ids dropped, since the last write
+        self.pending_updated = {}
+        self.pending_removed = set()
+        self.thread = None
+
+    def save(self, notes, files=None, updated=(), removed=()):
+        # Notes are replaced rather than edited in place, a shallow copy is a snapshot
+        with self.lock:
+            self.pending = list(notes)
+            if files:
+                self.pending_files.update(files)
+            for note in updated:
+                self.pending_updated[note.id] = note
+                self.pending_removed.discard(note.id)
+            for note_id in removed:
+                self.pending_updated.pop(note_id, None)
+                self.pending_removed.add(note_id)
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self.wakeup.set()
+
+    def close(self):
+        # Write whatever is still pending before the app exits
+        self.stopping.set()
+        if self.thread is not None:
+            self.wakeup.set()
+            self.thread.join()
+            self.thread = None
+        self._write_pending()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            # Give quick successive saves a chance to coalesce
+            self.stopping.wait(COALESCE_DELAY)
+            self._write_pending()
+            if self.stopping.is_set():
+                return
+
+    def pending_ids(self):
+        """Ids of the notes saved or dropped that are still to be written"""
+        with self.lock:
+            return set(self.pending_updated) | self.pending_removed
+
+    def _write_pending(self):
+        lock_file = None
+        try:
+            if self.lock_path:
+                # Taken before the pending changes, so that while another
+                # thread holds the lock they stay in pending_ids()
+                lock_file = acquire_lock(self.lock_path)
+            with self.lock:
+                notes, self.pending = self.pending, None
+                files, self.pending_files = self.pending_files, {}
+                updated, self.pending_updated = self.pending_updated, {}
+                removed, self.pending_removed = self.pending_removed, set()
+            for path, text in files.items():
+                if text is not None:
+                    write_atomic(path, text)
+            if notes is not None:
+                self.write_manifest(notes, updated, removed)
+            for path, text in files.items():
+                if text is None and os.path.exists(path):
+                    os.remove(path)
+        except Exception as e:
+            if self.on_error:
+                self.on_error(e)
+            else:
+                print(f"Error saving notes: {e}")
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+    def _write_manifest(self, notes, updated, removed):
+        write_json_atomic(self.path, notes, indent=2, default=encode_record)
+
+
+class NoteFileStore:
+    """Keeps a small manifest of notes plus one file per note body.
+
+    Manifest entries carry the id, title, snippet, color, date, size and body
+    hash, which is all the notes grid needs. Bodies are only read when a
+    note is opened. An old single-file notes.json is split up on first load.
+
+    A shared store can be used by several processes at once. Writes hold a
+    lock file next to the manifest. The writer starts from the manifest on
+    disk and puts only this process's own changes on top, so neither side's
+    notes are lost. changes() hands the other processes' notes to the app.
+    """
+
+    def __init__(self, directory, legacy_path=None, on_error=None, shared=False):
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.shared = shared
+        self.lock_path = self.manifest_path + '.lock' if shared else None
+        # What the manifest looked like when this process last read or wrote it
+        self.identity = None
+        self.writer = NotesWriter(
+            self.manifest_path,
+            on_error=on_error,
+            lock_path=self.lock_path,
+            write_manifest=self.write_shared_manifest if shared else None
+        )
+
+    @contextmanager
+    def lock(self):
+        """Hold the lock on the manifest of a shared store"""
+        if not self.shared:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = acquire_lock(self.lock_path)
+        try:
+            yield
+        finally:
+            lock_file.close()
+
+    def load(self):
+        with self.lock():
+            if os.path.exists(self.manifest_path):
+                notes = self.read_manifest()
+            elif self.legacy_path and os.path.exists(self.legacy_path):
+                notes = self.migrate()
+            else:
+                notes = []
+            self.identity = file_identity(self.manifest_path)
+            return notes
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return notes_from_dicts(json.load(f))
+        except FileNotFoundError:
+            return []
+
+    def has_changes(self):
+        """Check whether another process has saved since this one last looked"""
+        return self.shared and file_identity(self.manifest_path) != self.identity
+
+    def changes(self):
+        """Get (notes, local_ids) when another process has saved, or None
+
+        notes is the whole manifest as it is now. local_ids are the notes
+        this process has saved or dropped that are not written yet, their
+        entries in notes are out of date.
+        """
+        with self.lock():
+            if file_identity(self.manifest_path) == self.identity:
+                return None
+            notes = self.read_manifest()
+            self.identity = file_identity(self.manifest_path)
+            return notes, self.writer.pending_ids()
+
+    def write_shared_manifest(self, notes, updated, removed):
+        # Called by the writer holding the lock. The changes go on top of the
+        # manifest as it is now rather than writing notes, a snapshot that
+        # may predate notes changes() has merged in since
+        seen = file_identity(self.manifest_path) == self.identity
+        merged = {note.id: note for note in self.read_manifest()}
+        for note_id in removed:
+            merged.pop(note_id, None)
+        merged.update(updated)
+        write_json_atomic(self.manifest_path, list(merged.values()), indent=2, default=encode_record)
+        # When another process saved since this one last looked, left out of
+        # date so that changes() passes its notes on to the app
+        self.identity = file_identity(self.manifest_path) if seen else None
+
+    def load_newest(self, limit):
+        """The last limit notes of the manifest, read from its end, or None
+
+        Lets the newest cards be shown before load() has read the rest.
+        None when there is no manifest to read from yet.
+        """
+        if not os.path.exists(self.manifest_path):
+            return None
+        items = read_last_items(self.manifest_path, limit)
+        return None if items is None else notes_from_dicts(items)
+
+    def migrate(self):
+        with open(self.legacy_path, 'r') as f:
+            legacy_notes = json.load(f)
+        os.makedirs(self.directory, exist_ok=True)
+
+        notes = []
+        for legacy_note in legacy_notes:
+            note = Note.from_dict(legacy_note)
+            content = legacy_note.get('content', '')
+            self.describe(note, content)
+            write_atomic(self.body_path(note), content)
+            notes.append(note)
+        write_json_atomic(self.manifest_path, notes, indent=2, default=encode_record)
+        return notes
+
+    def body_path(self, note):
+        return os.path.join(self.directory, note.file)
+
+    def describe(self, note, content):
+        # Fill in the manifest fields for a note body, a string or a PieceTable
+        if note.id is None:
+            note.id = new_note_id()
+        if note.file is None:
+            note.file = note.id + '.txt'
+        if isinstance(content, str):
+            note.snippet = make_snippet(content)
+        else:
+            note.snippet = make_snippet(content.text_range(0, SNIPPET_CHARS))
+        note.size = len(content)
+        note.hash = content_hash(content)
+
+    def write_body(self, note, content):
+        # Write a body straight away, for bulk imports that should not queue
+        # every body in the writer; the manifest still goes through save()
+        os.makedirs(self.directory, exist_ok=True)
+        self.describe(note, content)
+        write_atomic(self.body_path(note), content)
+
+    def load_content(self, note):
+        try:
+            with open(self.body_path(note), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return ''
+    
+    def read_chunks(self, note):
+        try:
+            with open(self.body_path(note), 'r', encoding='utf-8') as f:
+                while True:
+                    chunk = f.read(CHUNK_CHARS)
+                    if not chunk:
+                        return
+                    yield chunk
+        except FileNotFoundError:
+            return
+    
+    def load_buffer(self, note):
+        # For bodies too big to edit as one string
+        return PieceTable.from_chunks(self.read_chunks(note))
+
+    def save(self, notes, changed=(), removed=(), updated=()):
+        # changed holds (note, content) pairs, removed holds notes to drop and
+        # updated holds notes whose body file is already up to date.
+        # A PieceTable content is written out in chunks as it is now
+        os.makedirs(self.directory, exist_ok=True)
+        files = {}
+        updated = list(updated)
+        for note, content in changed:
+            self.describe(note, content)
+            files[self.body_path(note)] = content if isinstance(content, str) else content.chunks()
+            updated.append(note)
+        for note in removed:
+            files[self.body_path(note)] = None
+        self.writer.save(notes, files, updated, [note.id for note in removed])
+
+    def close(self):
+        self.writer.close()
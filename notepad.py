@@ -1,29 +1,43 @@
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
-from kivymd.uix.toolbar import MDTopAppBar
-from kivymd.uix.textfield import MDTextField
-from kivymd.uix.dialog import MDDialog
-from kivymd.uix.button import MDFlatButton, MDRaisedButton, MDIconButton
 from kivymd.uix.card import MDCard
-from kivymd.uix.label import MDLabel
-from kivymd.uix.scrollview import MDScrollView
-from kivymd.uix.gridlayout import MDGridLayout
-from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.menu import MDDropdownMenu
 from kivy.lang import Builder
+from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.metrics import dp
 from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.properties import StringProperty, ListProperty
-import json
-import os
 from datetime import datetime
 
+from data_transfer import IMPORT_BATCH, NOTE_FIELDS, TransferReport, iter_notes, note_record, write_records
+from large_editor import LargeTextInput
+from note_index import NoteIndex
+from note_preview import PreviewLabel, parse_color
+from records import Note
+from note_storage import NoteFileStore, content_hash, new_note_id
+from text_buffer import PieceTable
+from widget_pool import WidgetPool
+
 Window.size = (400, 700)
 
-KV = '''
-#:import utils kivy.utils
+# Seconds of no typing before the open note is saved
+AUTOSAVE_DELAY = 1.0
+
+# Bodies this long are edited a window of lines at a time
+LARGE_NOTE_CHARS = 100000
 
+# Newest note cards shown before the whole manifest is loaded, a screen's worth
+FIRST_SCREEN_NOTES = 40
+
+# Whether other processes may save notes while the app runs, see NoteFileStore
+SHARED_NOTES = True
+# Seconds between checks for notes other processes saved
+SYNC_INTERVAL = 1.0
+# Past this many notes merged at once the list is rebuilt instead of card by card
+MERGE_CARD_LIMIT = 50
+
+KV = '''
 <NoteCard>:
     orientation: 'vertical'
     size_hint_y: None
@@ -40,7 +54,7 @@ KV = '''
         height: "32dp"
         spacing: "8dp"
         
-        MDLabel:
+        PreviewLabel:
             text: root.note_title
             font_style: "H6"
             bold: True
@@ -53,7 +67,7 @@ KV = '''
             size_hint_x: 0.15
             on_release: root.show_menu(self)
     
-    MDLabel:
+    PreviewLabel:
         text: root.note_content
         size_hint_y: 1
         theme_text_color: "Custom"
@@ -64,7 +78,7 @@ KV = '''
         shorten_from: "right"
         max_lines: 4
     
-    MDLabel:
+    PreviewLabel:
         text: root.note_date
         size_hint_y: None
         height: "20dp"
@@ -74,7 +88,6 @@ KV = '''
 
 MDScreenManager:
     NotesListScreen:
-    NoteEditorScreen:
 
 <NotesListScreen>:
     name: 'notes_list'
@@ -84,26 +97,35 @@ MDScreenManager:
             title: "Notebook"
             md_bg_color: app.theme_cls.primary_color
             elevation: 3
-            right_action_items: [["magnify", lambda x: app.show_search()], ["view-grid", lambda x: app.toggle_view()]]
+            right_action_items: [["magnify", lambda x: app.show_search()], ["view-grid", lambda x: app.toggle_view()], ["swap-vertical", lambda x: app.show_transfer_dialog()]]
         
         MDBoxLayout:
             orientation: 'vertical'
             padding: "8dp"
             
-            MDScrollView:
-                id: scroll_view
-                MDGridLayout:
+            RecycleView:
+                id: notes_view
+                RecycleGridLayout:
                     id: notes_grid
+                    viewclass: 'NoteCard'
                     cols: 2
                     spacing: "12dp"
                     padding: "8dp"
-                    adaptive_height: True
+                    default_size: None, dp(180)
+                    default_size_hint: 1, None
+                    size_hint_y: None
+                    height: self.minimum_height
         
         MDFloatingActionButton:
             icon: "plus"
             md_bg_color: app.theme_cls.primary_color
             pos_hint: {"center_x": 0.85, "center_y": 0.08}
             on_release: app.new_note()
+'''
+
+# Loaded the first time the editor is shown
+EDITOR_KV = '''
+#:import utils kivy.utils
 
 <NoteEditorScreen>:
     name: 'note_editor'
@@ -113,7 +135,7 @@ MDScreenManager:
             title: "Note"
             md_bg_color: app.theme_cls.primary_color
             elevation: 3
-            left_action_items: [["arrow-left", lambda x: app.back_to_list()]]
+            left_action_items: [["arrow-left", lambda x: app.close_editor()]]
             right_action_items: [["check", lambda x: app.save_note()]]
         
         MDScrollView:
@@ -126,6 +148,7 @@ MDScreenManager:
                 MDTextField:
                     id: title_field
                     hint_text: "Title"
+                    on_text: app.on_editor_changed()
                     mode: "fill"
                     size_hint_y: None
                     height: "56dp"
@@ -134,11 +157,20 @@ MDScreenManager:
                 MDTextField:
                     id: content_field
                     hint_text: "Take a note..."
+                    on_text: app.on_editor_changed()
                     mode: "fill"
                     multiline: True
                     size_hint_y: None
                     height: "400dp"
                 
+                LargeTextInput:
+                    id: large_field
+                    on_edit: app.on_editor_changed()
+                    size_hint_y: None
+                    height: 0
+                    opacity: 0
+                    disabled: True
+                
                 MDBoxLayout:
                     size_hint_y: None
                     height: "48dp"
@@ -194,50 +226,31 @@ MDScreenManager:
 '''
 
 
-class NoteCard(MDCard, ButtonBehavior):
+class NoteCard(RecycleDataViewBehavior, MDCard, ButtonBehavior):
     note_title = StringProperty("")
     note_content = StringProperty("")
     note_date = StringProperty("")
     card_color = ListProperty([1, 1, 1, 1])
     
-    def __init__(self, note_data, index, app_instance, **kwargs):
-        self.note_data = note_data
-        self.index = index
-        self.app_instance = app_instance
-        self.note_title = note_data.get('title', 'Untitled')
-        self.note_content = note_data.get('content', 'No content')
-        self.note_date = note_data.get('date', '')
-        
-        # Convert hex color to RGBA
-        color_hex = note_data.get('color', '#FFFFFF')
-        from kivy.utils import get_color_from_hex
-        self.card_color = get_color_from_hex(color_hex)
-        
+    def __init__(self, **kwargs):
+        self.note_id = None
+        self.app_instance = MDApp.get_running_app()
         super().__init__(**kwargs)
-        self.menu = None
+    
+    def refresh_view_attrs(self, rv, index, data):
+        # Cards are recycled, so rebind to whichever note scrolled into view
+        self.note_id = data['note_id']
+        self.note_title = data['note_title']
+        self.note_content = data['note_content']
+        self.note_date = data['note_date']
+        self.card_color = parse_color(data['color'])
     
     def on_release(self):
-        self.app_instance.open_note(self.index)
+        self.app_instance.open_note(self.note_id)
     
     def show_menu(self, button):
-        menu_items = [
-            {
-                "text": "Delete",
-                "viewclass": "OneLineListItem",
-                "on_release": lambda: self.delete_note(),
-            }
-        ]
-        self.menu = MDDropdownMenu(
-            caller=button,
-            items=menu_items,
-            width_mult=3,
-        )
-        self.menu.open()
-    
-    def delete_note(self):
-        if self.menu:
-            self.menu.dismiss()
-        self.app_instance.delete_note_by_index(self.index)
+        # One menu serves every card, it acts on the card it was last opened for
+        self.app_instance.show_card_menu(button, self.note_id)
 
 
 class NotesListScreen(MDScreen):
@@ -251,11 +264,39 @@ class NoteEditorScreen(MDScreen):
 class NotepadApp(MDApp):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.notes = []
-        self.current_note_index = None
+        # note id -> Note, oldest first
+        self.notes = {}
+        self.current_note_id = None
         self.current_note_color = "#FFFFFF"
+        # Old single-file notes, split into notes_dir on first load
         self.notes_file = 'notes.json'
+        self.notes_dir = 'notes'
+        self.note_store = NoteFileStore(
+            self.notes_dir,
+            legacy_path=self.notes_file,
+            on_error=self.on_save_error,
+            shared=SHARED_NOTES
+        )
+        self.index_file = 'notes_index.json'
         self.grid_view = True
+        self.search_index = None
+        self.search_query = ''
+        self.search_field = None
+        # note id -> position of its card in the list, rebuilt when needed
+        self.card_positions = None
+        # Dialogs and menus, built on first use
+        self.pool = WidgetPool()
+        # What the pooled card menu and delete dialog act on
+        self.menu_note_id = None
+        self.delete_note_id = None
+        
+        # Autosave for the editor. saved_state is the (title, color, body hash)
+        # last written for the open note, None while a new note is unsaved
+        self.editor_dirty = False
+        self.saved_state = None
+        self.autosave_trigger = Clock.create_trigger(self.autosave, AUTOSAVE_DELAY)
+        # Whether the body is in large_field rather than content_field
+        self.large_mode = False
         
     def build(self):
         self.theme_cls.theme_style = "Light"
@@ -264,133 +305,521 @@ class NotepadApp(MDApp):
         return Builder.load_string(KV)
     
     def on_start(self):
+        # Let the first frame draw the empty list before reading the notes
+        Window.bind(on_flip=self.on_first_frame)
+    
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        Clock.schedule_once(self.show_first_notes)
+    
+    def show_first_notes(self, *args):
+        # Show the newest cards from the end of the manifest, then load the
+        # whole manifest once they are on screen
+        try:
+            notes = self.note_store.load_newest(FIRST_SCREEN_NOTES)
+        except Exception as e:
+            print(f"Error reading notes: {e}")
+            notes = None
+        if not notes:
+            self.load_initial_notes()
+            return
+        self.get_notes_view().data = [self.card_data(note) for note in reversed(notes)]
+        Window.bind(on_flip=self.on_first_page)
+    
+    def on_first_page(self, *args):
+        Window.unbind(on_flip=self.on_first_page)
+        Clock.schedule_once(self.load_initial_notes)
+    
+    def load_initial_notes(self, *args):
         self.load_notes()
         self.refresh_notes_list()
+        if self.note_store.shared:
+            Clock.schedule_interval(self.sync_notes, SYNC_INTERVAL)
+    
+    def get_editor_screen(self):
+        # The editor rules and widgets are only built when first needed
+        if not self.root.has_screen('note_editor'):
+            Builder.load_string(EDITOR_KV)
+            self.root.add_widget(NoteEditorScreen())
+        return self.root.get_screen('note_editor')
     
     def load_notes(self):
-        if os.path.exists(self.notes_file):
-            try:
-                with open(self.notes_file, 'r') as f:
-                    self.notes = json.load(f)
-            except:
-                self.notes = []
-        else:
-            self.notes = []
+        # Only the manifest is read, note bodies load when a note is opened
+        try:
+            self.notes = {note.id: note for note in self.note_store.load()}
+        except Exception as e:
+            print(f"Error loading notes: {e}")
+            self.notes = {}
+    
+    def save_notes_to_file(self, changed=(), removed=(), updated=()):
+        # Written on a background thread, quick successive saves become one write.
+        # Every note saved or dropped is passed, so a shared store knows which
+        # notes are this process's own changes
+        self.note_store.save(self.notes.values(), changed, removed, updated)
+    
+    def sync_notes(self, *args):
+        # Take in the notes other processes saved, cheap when there are none
+        if not self.note_store.has_changes():
+            return
+        try:
+            changes = self.note_store.changes()
+        except Exception as e:
+            print(f"Error reading notes: {e}")
+            return
+        if changes is not None:
+            self.merge_notes(*changes)
+    
+    def merge_notes(self, notes, local_ids):
+        # Notes with changes of this process's own still to be written keep them
+        on_disk = set()
+        changed = []
+        for note in notes:
+            on_disk.add(note.id)
+            if note.id in local_ids:
+                continue
+            old_note = self.notes.get(note.id)
+            if old_note is None or old_note.to_dict() != note.to_dict():
+                self.notes[note.id] = note
+                changed.append(note)
+        removed = [note_id for note_id in self.notes if note_id not in on_disk and note_id not in local_ids]
+        for note_id in removed:
+            del self.notes[note_id]
+        if not changed and not removed:
+            return
+        
+        if self.search_index is not None:
+            for note in changed:
+                if note.id in self.search_index.order:
+                    self.search_index.replace(note, self.note_store.load_content(note))
+                else:
+                    self.search_index.add(note, self.note_store.load_content(note))
+            for note_id in removed:
+                self.search_index.remove(note_id)
+        
+        if self.search_query or len(changed) + len(removed) > MERGE_CARD_LIMIT:
+            # A search is run again once rather than for every card
+            self.refresh_notes_list()
+            return
+        for note in changed:
+            self.update_card(note)
+        for note_id in removed:
+            self.remove_card(note_id)
+    
+    def on_save_error(self, error):
+        # Called from the writer thread, report back on the UI thread
+        Clock.schedule_once(lambda dt: self.show_dialog("Error", f"Could not save notes: {error}"))
     
-    def save_notes_to_file(self):
-        with open(self.notes_file, 'w') as f:
-            json.dump(self.notes, f, indent=2)
+    def get_notes_view(self):
+        return self.root.get_screen('notes_list').ids.notes_view
     
     def refresh_notes_list(self):
-        list_screen = self.root.get_screen('notes_list')
-        notes_grid = list_screen.ids.notes_grid
-        notes_grid.clear_widgets()
+        # The recycle view only builds cards for the visible rows
+        if self.search_query:
+            note_ids = self.get_search_index().search(self.search_query)
+        else:
+            note_ids = reversed(self.notes)
         
-        for idx, note in enumerate(reversed(self.notes)):
-            real_idx = len(self.notes) - 1 - idx
-            card = NoteCard(note, real_idx, self)
-            notes_grid.add_widget(card)
+        self.get_notes_view().data = [self.card_data(self.notes[note_id]) for note_id in note_ids]
+        self.card_positions = None
+    
+    def card_data(self, note):
+        return {
+            'note_id': note.id,
+            'note_title': note.title,
+            'note_content': note.snippet,
+            'note_date': note.date,
+            'color': note.color,
+        }
+    
+    def card_position(self, note_id):
+        # Where the card for a note is in the list, None if it is not shown
+        if self.card_positions is None:
+            data = self.get_notes_view().data
+            self.card_positions = {card['note_id']: position for position, card in enumerate(data)}
+        return self.card_positions.get(note_id)
+    
+    def update_card(self, note):
+        # Only the card of the changed note is refreshed
+        if self.search_query:
+            # The note may now match the search or stop matching it
+            self.refresh_notes_list()
+            return
+        position = self.card_position(note.id)
+        data = self.get_notes_view().data
+        if position is None:
+            # New notes go first
+            data.insert(0, self.card_data(note))
+            self.card_positions = None
+        else:
+            data[position] = self.card_data(note)
+    
+    def remove_card(self, note_id):
+        position = self.card_position(note_id)
+        if position is not None:
+            self.get_notes_view().data.pop(position)
+            self.card_positions = None
     
     def toggle_view(self):
+        # The grid relayouts the existing cards, no need to rebuild the data
         list_screen = self.root.get_screen('notes_list')
         notes_grid = list_screen.ids.notes_grid
         self.grid_view = not self.grid_view
         notes_grid.cols = 2 if self.grid_view else 1
-        self.refresh_notes_list()
+    
+    def get_search_index(self):
+        # Loaded on first use so startup does not pay for it
+        if self.search_index is None:
+            self.search_index = NoteIndex.load(self.index_file, self.notes.values(), self.note_store.load_content)
+        return self.search_index
     
     def show_search(self):
-        # Placeholder for search functionality
-        self.show_dialog("Search", "Search feature coming soon!")
+        from kivymd.uix.button import MDFlatButton, MDRaisedButton
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.textfield import MDTextField
+        
+        def build():
+            self.search_field = MDTextField(
+                hint_text="Search notes",
+                mode="rectangle",
+                on_text_validate=lambda x: self.apply_search(dialog, x.text),
+            )
+            dialog = MDDialog(
+                title="Search",
+                type="custom",
+                content_cls=self.search_field,
+                buttons=[
+                    MDFlatButton(
+                        text="CLEAR",
+                        on_release=lambda x: self.apply_search(dialog, ''),
+                    ),
+                    MDRaisedButton(
+                        text="SEARCH",
+                        on_release=lambda x: self.apply_search(dialog, self.search_field.text),
+                    ),
+                ],
+            )
+            return dialog
+        
+        dialog = self.pool.dialog('search', build)
+        self.search_field.text = self.search_query
+        dialog.open()
+    
+    def apply_search(self, dialog, query):
+        self.search_query = query.strip()
+        list_screen = self.root.get_screen('notes_list')
+        list_screen.ids.notes_view.scroll_y = 1
+        self.refresh_notes_list()
+        dialog.dismiss()
     
     def new_note(self):
-        self.current_note_index = None
+        self.current_note_id = None
         self.current_note_color = "#FFFFFF"
-        editor_screen = self.root.get_screen('note_editor')
+        editor_screen = self.get_editor_screen()
         editor_screen.ids.title_field.text = ''
+        self.show_large_editor(False)
         editor_screen.ids.content_field.text = ''
+        self.reset_autosave(None)
         self.root.current = 'note_editor'
     
-    def open_note(self, index):
-        self.current_note_index = index
-        note = self.notes[index]
-        self.current_note_color = note.get('color', '#FFFFFF')
-        editor_screen = self.root.get_screen('note_editor')
-        editor_screen.ids.title_field.text = note.get('title', '')
-        editor_screen.ids.content_field.text = note.get('content', '')
+    def open_note(self, note_id):
+        self.current_note_id = note_id
+        note = self.notes[note_id]
+        self.current_note_color = note.color
+        editor_screen = self.get_editor_screen()
+        editor_screen.ids.title_field.text = note.title
+        if note.size >= LARGE_NOTE_CHARS:
+            self.show_large_editor(True)
+            editor_screen.ids.content_field.text = ''
+            editor_screen.ids.large_field.open_buffer(self.note_store.load_buffer(note))
+        else:
+            self.show_large_editor(False)
+            editor_screen.ids.content_field.text = self.note_store.load_content(note)
+        self.reset_autosave((note.title, note.color, note.hash))
         self.root.current = 'note_editor'
     
     def set_note_color(self, color):
         self.current_note_color = color
+        self.on_editor_changed()
     
-    def save_note(self):
-        editor_screen = self.root.get_screen('note_editor')
+    def reset_autosave(self, saved_state):
+        # The fields were just filled in from the note, that is not an edit
+        self.autosave_trigger.cancel()
+        self.editor_dirty = False
+        self.saved_state = saved_state
+    
+    def show_large_editor(self, large):
+        ids = self.get_editor_screen().ids
+        shown, hidden = (ids.large_field, ids.content_field) if large else (ids.content_field, ids.large_field)
+        shown.height = dp(400)
+        shown.opacity = 1
+        shown.disabled = False
+        hidden.height = 0
+        hidden.opacity = 0
+        hidden.disabled = True
+        if not large:
+            ids.large_field.close_buffer()
+        self.large_mode = large
+    
+    def switch_to_large_editor(self):
+        # A big paste moves the body into a buffer, only its first layout is slow
+        ids = self.get_editor_screen().ids
+        text = ids.content_field.text
+        line = text.count('\n', 0, ids.content_field.cursor_index())
+        self.show_large_editor(True)
+        ids.content_field.text = ''
+        ids.large_field.open_buffer(PieceTable(text), line)
+        ids.large_field.focus = True
+    
+    def on_editor_changed(self):
+        # Save once typing has paused
+        if not self.large_mode and len(self.get_editor_screen().ids.content_field.text) >= LARGE_NOTE_CHARS:
+            self.switch_to_large_editor()
+        self.editor_dirty = True
+        self.autosave_trigger.cancel()
+        self.autosave_trigger()
+    
+    def autosave(self, *args):
+        if self.editor_dirty:
+            self.write_note()
+    
+    def write_note(self):
+        """Save the note in the editor if it differs from what was last saved
+        
+        Returns False for an empty note, which is never saved.
+        """
+        self.autosave_trigger.cancel()
+        self.editor_dirty = False
+        editor_screen = self.get_editor_screen()
         title = editor_screen.ids.title_field.text
-        content = editor_screen.ids.content_field.text
+        if self.large_mode:
+            editor_screen.ids.large_field.commit()
+            content = editor_screen.ids.large_field.buffer
+        else:
+            content = editor_screen.ids.content_field.text
         
         if not title and not content:
-            self.show_dialog("Error", "Cannot save empty note")
-            return
+            return False
+        
+        body_hash = content_hash(content)
+        state = (title if title else 'Untitled', self.current_note_color, body_hash)
+        if state == self.saved_state:
+            return True
         
         current_date = datetime.now().strftime("%b %d, %Y")
         
-        note = {
-            'title': title if title else 'Untitled',
-            'content': content,
-            'color': self.current_note_color,
-            'date': current_date
-        }
+        note = Note(
+            title=state[0],
+            color=self.current_note_color,
+            date=current_date,
+            id=self.current_note_id or new_note_id()
+        )
+        
+        # The search index wants the body as one string
+        index_text = (content if isinstance(content, str) else content.text()) if self.search_index is not None else None
         
-        if self.current_note_index is None:
-            self.notes.append(note)
+        old_note = self.notes.get(note.id)
+        if old_note is None:
+            self.notes[note.id] = note
+            self.save_notes_to_file(changed=[(note, content)])
+            if self.search_index is not None:
+                self.search_index.add(note, index_text)
         else:
-            # Keep the original date if updating
-            if 'date' in self.notes[self.current_note_index]:
-                note['date'] = self.notes[self.current_note_index]['date']
-            self.notes[self.current_note_index] = note
+            # Keep the original date and body file if updating
+            if old_note.date:
+                note.date = old_note.date
+            note.file = old_note.file
+            self.notes[note.id] = note
+            if old_note.hash == body_hash:
+                # Only the title or color changed, the body file stays as it is
+                note.snippet, note.size, note.hash = old_note.snippet, old_note.size, old_note.hash
+                self.save_notes_to_file(updated=[note])
+            else:
+                self.save_notes_to_file(changed=[(note, content)])
+            if self.search_index is not None:
+                self.search_index.replace(note, index_text)
         
-        self.save_notes_to_file()
-        self.refresh_notes_list()
+        # Later autosaves update this note rather than adding another
+        self.current_note_id = note.id
+        self.saved_state = state
+        self.update_card(note)
+        return True
+    
+    def save_note(self):
+        if not self.write_note():
+            self.show_dialog("Error", "Cannot save empty note")
+            return
         self.back_to_list()
     
-    def delete_note_by_index(self, index):
-        dialog = MDDialog(
-            title="Delete Note",
-            text="Are you sure you want to delete this note?",
-            buttons=[
-                MDFlatButton(
-                    text="CANCEL",
-                    on_release=lambda x: dialog.dismiss()
-                ),
-                MDFlatButton(
-                    text="DELETE",
-                    theme_text_color="Custom",
-                    text_color=self.theme_cls.error_color,
-                    on_release=lambda x: self.confirm_delete_by_index(dialog, index)
-                ),
-            ],
-        )
-        dialog.open()
+    def close_editor(self):
+        # Leaving the editor keeps what was typed, an empty new note is dropped
+        self.write_note()
+        self.back_to_list()
+    
+    def show_card_menu(self, button, note_id):
+        def menu_items():
+            return [
+                {
+                    "text": "Delete",
+                    "viewclass": "OneLineListItem",
+                    "on_release": self.delete_menu_note,
+                }
+            ]
+        
+        self.menu_note_id = note_id
+        self.pool.menu('card', button, None, menu_items, width_mult=3)
+    
+    def delete_menu_note(self):
+        self.pool.dismiss('card')
+        self.delete_note(self.menu_note_id)
+    
+    def delete_note(self, note_id):
+        from kivymd.uix.button import MDFlatButton
+        from kivymd.uix.dialog import MDDialog
+        
+        def build():
+            dialog = MDDialog(
+                title="Delete Note",
+                text="Are you sure you want to delete this note?",
+                buttons=[
+                    MDFlatButton(
+                        text="CANCEL",
+                        on_release=lambda x: dialog.dismiss()
+                    ),
+                    MDFlatButton(
+                        text="DELETE",
+                        theme_text_color="Custom",
+                        text_color=self.theme_cls.error_color,
+                        on_release=lambda x: self.confirm_delete(dialog, self.delete_note_id)
+                    ),
+                ],
+            )
+            return dialog
+        
+        self.delete_note_id = note_id
+        self.pool.dialog('delete', build).open()
+    
+    def confirm_delete(self, dialog, note_id):
+        note = self.notes.pop(note_id, None)
+        if note is not None:
+            if self.search_index is not None:
+                self.search_index.remove(note_id)
+            self.save_notes_to_file(removed=[note])
+            self.remove_card(note_id)
+        dialog.dismiss()
     
-    def confirm_delete_by_index(self, dialog, index):
-        del self.notes[index]
-        self.save_notes_to_file()
+    def import_notes(self, path):
+        # Bodies are written as they are read and the manifest every
+        # IMPORT_BATCH notes, a note with the id of an existing one replaces it
+        report = TransferReport()
+        pending = []
+        for note, content in iter_notes(path, report):
+            old_note = self.notes.get(note.id) if note.id is not None else None
+            if old_note is None:
+                report.added += 1
+            else:
+                report.updated += 1
+                note.date = note.date or old_note.date
+                note.file = old_note.file
+            # Gives a note without an id its new one
+            self.note_store.write_body(note, content)
+            self.notes[note.id] = note
+            pending.append(note)
+            if len(pending) >= IMPORT_BATCH:
+                self.save_notes_to_file(updated=pending)
+                pending = []
+        if pending:
+            self.save_notes_to_file(updated=pending)
+        
+        if self.search_index is not None:
+            self.search_index.sync(self.notes.values(), self.note_store.load_content)
         self.refresh_notes_list()
+        return report
+    
+    def export_notes(self, path):
+        # One body is read at a time as the file is written
+        records = (note_record(note, self.note_store.load_content(note)) for note in self.notes.values())
+        return write_records(path, records, NOTE_FIELDS)
+    
+    def show_transfer_dialog(self):
+        from kivymd.uix.button import MDFlatButton, MDRaisedButton
+        from kivymd.uix.dialog import MDDialog
+        from kivymd.uix.textfield import MDTextField
+        
+        def build():
+            path_field = MDTextField(
+                text="notes.jsonl",
+                hint_text="File (.csv or .jsonl)",
+                mode="rectangle",
+            )
+            dialog = MDDialog(
+                title="Import / Export Notes",
+                type="custom",
+                content_cls=path_field,
+                buttons=[
+                    MDFlatButton(
+                        text="CANCEL",
+                        on_release=lambda x: dialog.dismiss(),
+                    ),
+                    MDFlatButton(
+                        text="EXPORT",
+                        on_release=lambda x: self.confirm_transfer(dialog, path_field.text.strip(), False),
+                    ),
+                    MDRaisedButton(
+                        text="IMPORT",
+                        on_release=lambda x: self.confirm_transfer(dialog, path_field.text.strip(), True),
+                    ),
+                ],
+            )
+            return dialog
+        
+        self.pool.dialog('transfer', build).open()
+    
+    def confirm_transfer(self, dialog, path, importing):
         dialog.dismiss()
+        try:
+            if importing:
+                message = self.import_notes(path).summary("notes")
+            else:
+                message = f"{self.export_notes(path)} notes written to {path}"
+        except (OSError, ValueError) as e:
+            message = f"Could not {'import' if importing else 'export'} {path}: {e}"
+        self.show_dialog("Import" if importing else "Export", message)
+    
+    def on_stop(self):
+        if self.editor_dirty:
+            self.write_note()
+        self.note_store.close()
+        
+        # An index that was never loaded is brought up to date on its next load
+        if self.search_index is not None and self.search_index.dirty:
+            try:
+                self.search_index.save(self.index_file)
+            except Exception as e:
+                print(f"Error saving search index: {e}")
     
     def back_to_list(self):
         self.root.current = 'notes_list'
     
     def show_dialog(self, title, text):
-        dialog = MDDialog(
-            title=title,
-            text=text,
-            buttons=[
-                MDFlatButton(
-                    text="OK",
-                    on_release=lambda x: dialog.dismiss()
-                ),
-            ],
-        )
+        from kivymd.uix.button import MDFlatButton
+        from kivymd.uix.dialog import MDDialog
+        
+        def build():
+            dialog = MDDialog(
+                title=title,
+                text=text,
+                buttons=[
+                    MDFlatButton(
+                        text="OK",
+                        on_release=lambda x: dialog.dismiss()
+                    ),
+                ],
+            )
+            return dialog
+        
+        dialog = self.pool.dialog('message', build)
+        dialog.title = title
+        dialog.text = text
         dialog.open()
 
 
@@ -0,0 +1,116 @@
+"""
+Phenry Todo Application - Records
+Compact record types for tasks and notes, with codecs for the JSON files
+"""
+
+import os
+import sys
+
+
+class Task:
+    """A todo task, stored in todo_data.json as a dict with the same keys"""
+
+    __slots__ = ("id", "text", "completed", "category", "created_at")
+
+    def __init__(self, id, text, completed=False, category="General", created_at=""):
+        self.id = id
+        self.text = text
+        self.completed = completed
+        # Categories repeat across many tasks, share one string per category
+        self.category = sys.intern(category)
+        self.created_at = created_at
+
+    @classmethod
+    def from_dict(cls, data):
+        """Decode a task from its JSON dict"""
+        return cls(
+            data["id"],
+            data["text"],
+            bool(data.get("completed", False)),
+            data.get("category", "General"),
+            data.get("created_at", "")
+        )
+
+    def to_dict(self):
+        """Encode a task as its JSON dict"""
+        return {
+            "id": self.id,
+            "text": self.text,
+            "completed": self.completed,
+            "category": self.category,
+            "created_at": self.created_at
+        }
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, text={self.text!r}, completed={self.completed!r}, category={self.category!r})"
+
+
+class Note:
+    """A notepad manifest entry, the body lives in its own file
+
+    id never changes once given. Notes saved before ids existed take the
+    name of their body file, which was already unique.
+    """
+
+    __slots__ = ("id", "title", "color", "date", "file", "snippet", "size", "hash")
+
+    def __init__(self, title="Untitled", color="#FFFFFF", date="", file=None, snippet="", size=0, hash=None, id=None):
+        if id is None and file is not None:
+            id = os.path.splitext(file)[0]
+        self.id = id
+        self.title = title
+        # Only a handful of colors are ever used
+        self.color = sys.intern(color)
+        self.date = date
+        self.file = file
+        self.snippet = snippet
+        self.size = size
+        self.hash = hash
+
+    @classmethod
+    def from_dict(cls, data):
+        """Decode a note from its manifest dict"""
+        return cls(
+            data.get("title", "Untitled"),
+            data.get("color", "#FFFFFF"),
+            data.get("date", ""),
+            data.get("file"),
+            data.get("snippet", ""),
+            data.get("size", 0),
+            data.get("hash"),
+            data.get("id")
+        )
+
+    def to_dict(self):
+        """Encode a note as its manifest dict"""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "color": self.color,
+            "date": self.date,
+            "file": self.file,
+            "snippet": self.snippet,
+            "size": self.size,
+            "hash": self.hash
+        }
+
+    def __repr__(self):
+        return f"Note(id={self.id!r}, title={self.title!r})"
+
+
+def encode_record(record):
+    """json.dump default= hook, so lists of records can be dumped directly"""
+    try:
+        return record.to_dict()
+    except AttributeError:
+        raise TypeError(f"Object of type {type(record).__name__} is not JSON serializable") from None
+
+
+def tasks_from_dicts(items):
+    """Decode a list of task dicts"""
+    return [Task.from_dict(item) for item in items]
+
+
+def notes_from_dicts(items):
+    """Decode a list of note dicts"""
+    return [Note.from_dict(item) for item in items]
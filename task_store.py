@@ -0,0 +1,185 @@
+"""
+Phenry Todo Application - Task Store
+In-memory task collection indexed by id, with a columnar table for filtering
+"""
+
+import sys
+
+from task_table import TaskTable, sort_value
+
+# Sort choices offered by the filter menu -> (table column, descending)
+SORT_ORDERS = {
+    "list": (None, False),
+    "newest": ("created", True),
+    "oldest": ("created", False),
+    "alpha": ("text", False),
+    "category": ("category", False),
+    "status": ("completed", False),
+}
+
+
+def task_matches(task, status="all", category="All", search=""):
+    """Check one task against a status, category and lowercase search filter"""
+    if status != "all" and task.completed != (status == "completed"):
+        return False
+    if category != "All" and task.category != category:
+        return False
+    return not search or search in task.text.lower()
+
+
+def order_key(task, sort, group, tiebreak):
+    """Key ordering tasks the way query(sort=sort, group=group) does
+
+    Descending sorts are only used on numeric columns, which are negated.
+    """
+    column, reverse = SORT_ORDERS[sort]
+    key = (tiebreak,)
+    if column is not None:
+        value = sort_value(task, column)
+        key = (-value if reverse else value,) + key
+    if group:
+        key = (task.category,) + key
+    return key
+
+
+class TaskStore:
+    """Holds the Task records with the table kept up to date on every mutation"""
+
+    def __init__(self, tasks=()):
+        # id -> task, in insertion order
+        self.by_id = {}
+        # Columnar copy used for filtering, counting and sorting
+        self.table = TaskTable()
+        # Bumped on every mutation so cached query results can be dropped
+        self.version = 0
+        # (status, category, sort, group, version, search, result) of the last query
+        self.last_query = None
+
+        tasks = list(tasks)
+        by_id = {task.id: task for task in tasks}
+        if len(by_id) == len(tasks):
+            # No repeated ids, the table can be filled column by column
+            self.by_id = by_id
+            self.table.extend(tasks)
+        else:
+            for task in tasks:
+                self.add(task)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __contains__(self, task_id):
+        return task_id in self.by_id
+
+    def get(self, task_id):
+        """Get a task by id, or None"""
+        return self.by_id.get(task_id)
+
+    def add(self, task):
+        """Add a task, replacing any task with the same id"""
+        task_id = task.id
+        if task_id in self.by_id:
+            self.remove(task_id)
+
+        self.by_id[task_id] = task
+        self.table.append(task)
+        self.version += 1
+
+    def remove(self, task_id):
+        """Remove a task by id and return it, or None if missing"""
+        task = self.by_id.pop(task_id, None)
+        if task is not None:
+            self.table.remove(task_id)
+            self.version += 1
+        return task
+
+    def set_completed(self, task_id, completed):
+        """Set the completion status of a task"""
+        task = self.by_id.get(task_id)
+        if task is not None and task.completed != completed:
+            task.completed = completed
+            self.table.set_completed(task)
+            self.version += 1
+        return task
+
+    def toggle(self, task_id):
+        """Flip the completion status of a task"""
+        task = self.by_id.get(task_id)
+        if task is not None:
+            self.set_completed(task_id, not task.completed)
+        return task
+
+    def update(self, task_id, text, category):
+        """Change the text and category of a task"""
+        task = self.by_id.get(task_id)
+        if task is not None:
+            task.text = text
+            task.category = sys.intern(category)
+            self.table.update(task)
+            self.version += 1
+        return task
+
+    def remove_completed(self):
+        """Remove all completed tasks and return them"""
+        removed = self.table.select("completed")
+        for task in removed:
+            self.remove(task.id)
+        return removed
+
+    def filter(self, status="all", category="All"):
+        """Get the tasks matching a status and category filter, in list order"""
+        return self.table.select(status, category)
+
+    def query(self, status="all", category="All", search="", limit=None, offset=0, sort="list", group=False):
+        """Filter by status, category and lowercase search text
+
+        sort is one of SORT_ORDERS and group orders the result by category
+        first. Asking again for the same result, as each later page does,
+        reuses the previous one. When only the search text grew since the
+        last query, the previous result is narrowed instead of scanning the
+        table again. limit and offset page through the result.
+        """
+        key = (status, category, sort, group, self.version)
+        last = self.last_query
+        if last is not None and last[:5] == key and search == last[5]:
+            result = last[6]
+        elif last is not None and last[:5] == key and search.startswith(last[5]):
+            folded = self.folded_text
+            result = [task for task in last[6] if search in folded(task)]
+        else:
+            column, reverse = SORT_ORDERS[sort]
+            result = self.table.select(status, category, search, column, reverse, group)
+
+        self.last_query = key + (search, result)
+        if limit is not None:
+            return result[offset:offset + limit]
+        return result
+
+    def sort_key(self, task, sort="list", group=False):
+        """Get the key of a task in the order query(sort=sort, group=group) returns"""
+        return order_key(task, sort, group, self.table.rows[task.id])
+
+    def count(self, status="all", category="All"):
+        """Count the tasks matching a status and category filter"""
+        return self.table.count(status, category)
+
+    def category_counts(self, status="all", category="All", search=""):
+        """Get {category: task count} over the tasks matching a filter"""
+        return self.table.category_counts(self.table.mask(status, category, search))
+
+    def folded_text(self, task):
+        """Get the lowercase text of a task"""
+        return self.table.folded_text(task)
+
+    def stats(self):
+        """Get (total, active, completed) counts"""
+        completed = self.table.done
+        total = len(self.by_id)
+        return total, total - completed, completed
+
+    def to_list(self):
+        """Get all tasks as a list, in list order"""
+        return list(self.by_id.values())
@@ -0,0 +1,344 @@
+"""
+Phenry Todo Application - Task Table
+Column-per-field copy of the task list for bulk filtering, counting and sorting
+"""
+
+import array
+from functools import lru_cache
+from itertools import compress
+
+# Values of the state column, dead rows are removed tasks awaiting compaction
+DEAD = 0
+ACTIVE = 1
+DONE = 2
+
+# translate() tables turning the state column into 0/1 row masks
+STATE_MASKS = {
+    "all": bytes([0, 1, 1]) + bytes(253),
+    "active": bytes([0, 1, 0]) + bytes(253),
+    "completed": bytes([0, 0, 1]) + bytes(253),
+}
+
+# Category codes fit in a byte, code 0 marks dead rows and every category
+# past the first 254 shares the last code
+MAX_CODE = 255
+
+# Compact once at least this many rows are dead and they are half the table
+COMPACT_MIN = 1024
+
+# Strips the separators out of "YYYY-MM-DD HH:MM"
+DATE_SEPARATORS = str.maketrans("", "", "-: ")
+
+
+def created_key(created_at):
+    """Integer YYYYMMDDHHMM for a created_at string, 0 if it does not parse"""
+    digits = created_at[:16].translate(DATE_SEPARATORS)
+    if len(digits) != 12 or not digits.isdigit():
+        return 0
+    return int(digits)
+
+
+def sort_value(task, column):
+    """The sort key sort_keys(column) holds for a single task"""
+    if column == "created":
+        return created_key(task.created_at)
+    if column == "text":
+        return task.text.casefold()
+    if column == "category":
+        return task.category
+    if column == "completed":
+        return task.completed
+    raise ValueError(f"Unknown sort column: {column}")
+
+
+@lru_cache(maxsize=None)
+def numpy_module():
+    """numpy, imported the first time rows are sorted, or None if it is missing
+
+    Importing numpy takes longer than starting the command line tool, which
+    mostly never sorts.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def stable_argsort(values, reverse=False):
+    """numpy.argsort that keeps equal values in their original order both ways"""
+    numpy = numpy_module()
+    if not reverse:
+        return numpy.argsort(values, kind="stable")
+    last = len(values) - 1
+    return (last - numpy.argsort(values[::-1], kind="stable"))[::-1]
+
+
+def and_masks(a, b):
+    """Row-wise AND of two 0/1 masks of the same length"""
+    size = len(a)
+    return (int.from_bytes(a, "little") & int.from_bytes(b, "little")).to_bytes(size, "little")
+
+
+class TaskTable:
+    """Tasks laid out as parallel columns, one row per task in list order
+
+    Filters are built as byte masks with bytes.translate and combined with
+    a single integer AND, so selecting and counting rows never loops over
+    the tasks in Python. Removed tasks leave dead rows behind until enough
+    pile up to make compacting worthwhile.
+    """
+
+    def __init__(self):
+        self.tasks = []
+        # DEAD, ACTIVE or DONE per row
+        self.state = bytearray()
+        # Category code per row
+        self.category = bytearray()
+        # created_key() per row, built the first time it is sorted on
+        self.created = None
+        # Lowercased text per row, used by search
+        self.folded = []
+        # Casefolded text per row, built the first time it is sorted on
+        self.sort_text = None
+        # id -> row
+        self.rows = {}
+        self.category_codes = {}
+        self.category_names = [None]
+        self.dead = 0
+        self.done = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append(self, task):
+        """Add a task as the last row"""
+        self.rows[task.id] = len(self.tasks)
+        self.tasks.append(task)
+        self.state.append(DONE if task.completed else ACTIVE)
+        self.category.append(self._code(task.category))
+        if self.created is not None:
+            self.created.append(created_key(task.created_at))
+        self.folded.append(task.text.lower())
+        if self.sort_text is not None:
+            self.sort_text.append(task.text.casefold())
+        if task.completed:
+            self.done += 1
+
+    def extend(self, tasks):
+        """Add tasks as the last rows, column by column"""
+        start = len(self.tasks)
+        self.tasks.extend(tasks)
+        added = self.tasks[start:]
+        self.rows.update((task.id, row) for row, task in enumerate(added, start))
+        self.state.extend(DONE if task.completed else ACTIVE for task in added)
+        codes = self.category_codes
+        code = self._code
+        self.category.extend(codes.get(task.category) or code(task.category) for task in added)
+        if self.created is not None:
+            self.created.extend(created_key(task.created_at) for task in added)
+        self.folded.extend(task.text.lower() for task in added)
+        if self.sort_text is not None:
+            self.sort_text.extend(task.text.casefold() for task in added)
+        self.done += self.state.count(DONE, start)
+
+    def remove(self, task_id):
+        """Drop the row of a task"""
+        row = self.rows.pop(task_id, None)
+        if row is None:
+            return
+        if self.state[row] == DONE:
+            self.done -= 1
+        self.tasks[row] = None
+        self.state[row] = DEAD
+        self.category[row] = 0
+        self.folded[row] = None
+        if self.sort_text is not None:
+            self.sort_text[row] = ""
+        self.dead += 1
+        if self.dead >= COMPACT_MIN and self.dead * 2 >= len(self.tasks):
+            self.compact()
+
+    def set_completed(self, task):
+        """Copy the completed flag of a task into its row"""
+        row = self.rows[task.id]
+        state = DONE if task.completed else ACTIVE
+        if self.state[row] != state:
+            self.done += 1 if task.completed else -1
+            self.state[row] = state
+
+    def update(self, task):
+        """Copy the text and category of a task into its row"""
+        row = self.rows[task.id]
+        self.category[row] = self._code(task.category)
+        self.folded[row] = task.text.lower()
+        if self.sort_text is not None:
+            self.sort_text[row] = task.text.casefold()
+
+    def folded_text(self, task):
+        """Get the lowercased text of a task"""
+        return self.folded[self.rows[task.id]]
+
+    def mask(self, status="all", category="All", search=""):
+        """Get a 0/1 byte per row for the rows matching a status, category and search"""
+        mask = self.state.translate(STATE_MASKS[status])
+        if category != "All":
+            mask = and_masks(mask, self._category_mask(category))
+        if search:
+            mask = self._search_mask(mask, search)
+        return mask
+
+    def select(self, status="all", category="All", search="", column=None, reverse=False, group=False):
+        """Get the matching tasks, in list order or sorted as for sorted_rows"""
+        mask = self.mask(status, category, search)
+        if column is None and not group:
+            return list(compress(self.tasks, mask))
+        return [self.tasks[row] for row in self.sorted_rows(mask, column, reverse, group)]
+
+    def count(self, status="all", category="All"):
+        """Count the matching tasks"""
+        if category == "All":
+            if status == "all":
+                return len(self)
+            return self.done if status == "completed" else len(self) - self.done
+        return self.mask(status, category).count(1)
+
+    def category_counts(self, mask=None):
+        """Get {category: task count} for every category in use, or in the rows of mask"""
+        codes = self.category if mask is None else bytes(compress(self.category, mask))
+        counts = {}
+        for code, name in enumerate(self.category_names):
+            if name is not None and code != MAX_CODE:
+                count = codes.count(code)
+                if count:
+                    counts[name] = count
+        if len(self.category_names) > MAX_CODE:
+            # Categories sharing the last code are counted one by one
+            shared = self.category.translate(self._code_table(MAX_CODE))
+            if mask is not None:
+                shared = and_masks(shared, mask)
+            for task in compress(self.tasks, shared):
+                counts[task.category] = counts.get(task.category, 0) + 1
+        return counts
+
+    def sorted_rows(self, mask, column=None, reverse=False, group=False):
+        """Get the rows picked by mask in sort order, ties kept in list order
+
+        column is None for list order, or "created", "completed", "category"
+        or "text". group puts the rows in category order, keeping the column
+        order within each category.
+        """
+        # Text is sorted faster by sorted() than by numpy on object arrays
+        numpy = numpy_module() if column != "text" else None
+        if numpy is not None:
+            rows = numpy.flatnonzero(numpy.frombuffer(mask, dtype=numpy.uint8))
+            if column is not None:
+                rows = rows[stable_argsort(self._key_array(column)[rows], reverse)]
+            if group:
+                rows = rows[stable_argsort(self._key_array("category")[rows])]
+            return rows.tolist()
+
+        rows = list(compress(range(len(mask)), mask))
+        if column is not None:
+            rows.sort(key=self.sort_keys(column).__getitem__, reverse=reverse)
+        if group:
+            rows.sort(key=self.sort_keys("category").__getitem__)
+        return rows
+
+    def sort_keys(self, column):
+        """Get the per-row sort keys of a column
+
+        Created timestamps and folded text are worked out once and kept up
+        to date as tasks change, so switching the sort does no parsing.
+        """
+        if column == "created":
+            if self.created is None:
+                self.created = self._created_column()
+            return self.created
+        if column == "completed":
+            return self.state
+        if column == "category":
+            return self.category.translate(self._category_ranks())
+        if column == "text":
+            if self.sort_text is None:
+                self.sort_text = [task.text.casefold() if task else "" for task in self.tasks]
+            return self.sort_text
+        raise ValueError(f"Unknown sort column: {column}")
+
+    def compact(self):
+        """Drop the dead rows and renumber the rest"""
+        alive = self.state.translate(STATE_MASKS["all"])
+        self.tasks = list(compress(self.tasks, alive))
+        self.state = bytearray(compress(self.state, alive))
+        if self.created is not None:
+            self.created = array.array("q", compress(self.created, alive))
+        self.folded = list(compress(self.folded, alive))
+        if self.sort_text is not None:
+            self.sort_text = list(compress(self.sort_text, alive))
+        self.rows = {task.id: row for row, task in enumerate(self.tasks)}
+        # Hand out category codes again so unused ones are freed
+        self.category_codes = {}
+        self.category_names = [None]
+        self.category = bytearray(self._code(task.category) for task in self.tasks)
+        self.dead = 0
+
+    def _key_array(self, column):
+        numpy = numpy_module()
+        keys = self.sort_keys(column)
+        return numpy.frombuffer(keys, dtype=numpy.int64 if column == "created" else numpy.uint8)
+
+    def _search_mask(self, mask, search):
+        # Narrow a mask to the rows whose text contains search
+        matched = bytearray(len(mask))
+        for row, text in zip(compress(range(len(mask)), mask), compress(self.folded, mask)):
+            if search in text:
+                matched[row] = 1
+        return matched
+
+    def _created_column(self):
+        # Timestamps have minute resolution, so many rows share a string
+        parsed = {}
+        column = array.array("q")
+        for task in self.tasks:
+            if task is None:
+                column.append(0)
+                continue
+            key = parsed.get(task.created_at)
+            if key is None:
+                key = parsed[task.created_at] = created_key(task.created_at)
+            column.append(key)
+        return column
+
+    def _code(self, category):
+        code = self.category_codes.get(category)
+        if code is None:
+            code = min(len(self.category_names), MAX_CODE)
+            self.category_codes[category] = code
+            if code == len(self.category_names):
+                self.category_names.append(category)
+        return code
+
+    def _code_table(self, code):
+        table = bytearray(256)
+        table[code] = 1
+        return bytes(table)
+
+    def _category_mask(self, category):
+        code = self.category_codes.get(category)
+        if code is None:
+            return bytes(len(self.tasks))
+        mask = self.category.translate(self._code_table(code))
+        if code == MAX_CODE:
+            mask = bytearray(mask)
+            for row in compress(range(len(mask)), mask):
+                if self.tasks[row].category != category:
+                    mask[row] = 0
+        return mask
+
+    def _category_ranks(self):
+        # translate() table from category code to alphabetical rank
+        names = sorted((name, code) for code, name in enumerate(self.category_names) if name is not None)
+        table = bytearray(256)
+        for rank, (name, code) in enumerate(names[:MAX_CODE], 1):
+            table[code] = rank
+        return bytes(table)
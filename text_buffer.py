@@ -0,0 +1,132 @@
+import array
+import bisect
+from itertools import accumulate, islice
+
+# Characters handed out at a time when a buffer is read back
+CHUNK_CHARS = 1 << 16
+
+
+def newline_offsets(chunks):
+    # Join text chunks, noting where every newline is along the way
+    parts = []
+    offsets = array.array('q')
+    base = 0
+    for chunk in chunks:
+        lines = chunk.split('\n')
+        if len(lines) > 1:
+            ends = accumulate((len(line) + 1 for line in lines[:-1]), initial=base - 1)
+            offsets.extend(islice(ends, 1, None))
+        parts.append(chunk)
+        base += len(chunk)
+    return ''.join(parts), offsets
+
+
+class PieceTable:
+    """Text held as pieces of the loaded body and of the strings put in since.
+
+    An edit only splits the pieces it touches, the body itself is never
+    copied. Newlines in the body are found once when it loads, so looking
+    up a line stays cheap for multi-megabyte notes. Pieces are never
+    changed in place, so chunks() can be read from another thread while
+    editing carries on.
+    """
+
+    def __init__(self, text=''):
+        self.original, self.newlines = newline_offsets([text])
+        self.pieces = [self._piece(self.original, 0, len(self.original))] if text else []
+        self.length = len(text)
+        self.version = 0
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        buffer = cls()
+        buffer.original, buffer.newlines = newline_offsets(chunks)
+        if buffer.original:
+            buffer.pieces = [buffer._piece(buffer.original, 0, len(buffer.original))]
+        buffer.length = len(buffer.original)
+        return buffer
+
+    def __len__(self):
+        return self.length
+
+    def line_count(self):
+        return sum(piece[3] for piece in self.pieces) + 1
+
+    def line_offset(self, line):
+        """Offset where line (counted from 0) starts, the length if past the end"""
+        if line <= 0:
+            return 0
+        position = 0
+        seen = 0
+        for source, start, end, count in self.pieces:
+            if seen + count >= line:
+                newline = self._newline(source, start, line - seen)
+                return position + newline - start + 1
+            seen += count
+            position += end - start
+        return self.length
+
+    def text_range(self, start, end):
+        parts = []
+        position = 0
+        for source, piece_start, piece_end, count in self.pieces:
+            size = piece_end - piece_start
+            if position + size > start and position < end:
+                parts.append(source[piece_start + max(0, start - position):piece_start + min(size, end - position)])
+            position += size
+            if position >= end:
+                break
+        return ''.join(parts)
+
+    def text(self):
+        return ''.join(self.chunks())
+
+    def replace(self, start, end, text):
+        """Put text in place of the characters from start to end"""
+        before = []
+        after = []
+        position = 0
+        for piece in self.pieces:
+            source, piece_start, piece_end, count = piece
+            piece_end_position = position + piece_end - piece_start
+            if piece_end_position <= start:
+                before.append(piece)
+            elif position >= end:
+                after.append(piece)
+            else:
+                if position < start:
+                    before.append(self._piece(source, piece_start, piece_start + start - position))
+                if piece_end_position > end:
+                    after.append(self._piece(source, piece_start + end - position, piece_end))
+            position = piece_end_position
+        if text:
+            before.append(self._piece(text, 0, len(text)))
+        self.pieces = before + after
+        self.length += len(text) - (end - start)
+        self.version += 1
+
+    def chunks(self):
+        """The text as strings of at most CHUNK_CHARS, as it is right now"""
+        return self._chunks(list(self.pieces))
+
+    @staticmethod
+    def _chunks(pieces):
+        for source, start, end, count in pieces:
+            for chunk_start in range(start, end, CHUNK_CHARS):
+                yield source[chunk_start:min(end, chunk_start + CHUNK_CHARS)]
+
+    def _piece(self, source, start, end):
+        if source is self.original:
+            count = bisect.bisect_left(self.newlines, end) - bisect.bisect_left(self.newlines, start)
+        else:
+            count = source.count('\n', start, end)
+        return (source, start, end, count)
+
+    def _newline(self, source, start, number):
+        # Offset in source of the number-th newline from start
+        if source is self.original:
+            return self.newlines[bisect.bisect_left(self.newlines, start) + number - 1]
+        newline = start - 1
+        for _ in range(number):
+            newline = source.find('\n', newline + 1)
+        return newline
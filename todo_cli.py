@@ -0,0 +1,138 @@
+"""
+Phenry Todo Application - Command Line
+Manage the task list from a shell or a batch job, without starting Kivy
+
+Usage:
+    python todo_cli.py add "Buy milk" --category Shopping
+    python todo_cli.py list --filter active --category Work --search report
+    python todo_cli.py done 3 7 12
+    python todo_cli.py clear-completed
+    python todo_cli.py stats
+
+Works on the same todo_data.json as the app. With the default "shared"
+storage it can run while the app is open, every save merges in what other
+processes saved and the app picks up its changes within a second. With
+the other storage modes, run it while the app is closed.
+"""
+
+import argparse
+import os
+import sys
+
+from task_store import SORT_ORDERS
+from todo_list import TodoList
+
+
+def format_task(task):
+    mark = "x" if task.completed else " "
+    return f"{task.id:>6} [{mark}] {task.category:<10} {task.text}  ({task.created_at})\n"
+
+
+def command_add(todo, args):
+    text = " ".join(args.text).strip()
+    if not text:
+        raise ValueError("task text is empty")
+    if args.category not in todo.categories:
+        todo.categories.append(args.category)
+    task = todo.add_task(text, args.category)
+    print(f"Added task {task.id}")
+
+
+def command_list(todo, args):
+    tasks = todo.store.query(
+        args.filter,
+        args.category,
+        args.search.lower(),
+        args.limit,
+        args.offset,
+        args.sort
+    )
+    sys.stdout.writelines(format_task(task) for task in tasks)
+
+
+def command_done(todo, args):
+    missing = [task_id for task_id in args.ids if task_id not in todo.store]
+    todo.complete_tasks(args.ids, not args.undo)
+    if missing:
+        raise ValueError(f"no task with id {', '.join(map(str, missing))}")
+
+
+def command_clear_completed(todo, args):
+    removed = todo.clear_completed_tasks()
+    print(f"Removed {len(removed)} completed tasks")
+
+
+def command_stats(todo, args):
+    total, active, completed = todo.store.stats()
+    print(f"{total} tasks | {active} active | {completed} done")
+    if args.categories:
+        counts = {}
+        for task in todo.store:
+            counts[task.category] = counts.get(task.category, 0) + 1
+        for category in sorted(counts):
+            print(f"  {category:<10} {counts[category]:>6}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="todo_cli.py", description="Manage the Phenry todo list")
+    parser.add_argument("--file", default="todo_data.json", help="data file (default: %(default)s)")
+    parser.add_argument("--storage", choices=["shared", "journal", "json", "sqlite"], default="shared",
+                        help="storage mode the app uses (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("text", nargs="+")
+    add.add_argument("--category", default="General")
+    add.set_defaults(run=command_add)
+
+    show = commands.add_parser("list", help="list tasks")
+    show.add_argument("--filter", choices=["all", "active", "completed"], default="all")
+    show.add_argument("--category", default="All")
+    show.add_argument("--search", default="")
+    show.add_argument("--sort", choices=list(SORT_ORDERS), default="list")
+    show.add_argument("--limit", type=int)
+    show.add_argument("--offset", type=int, default=0)
+    show.set_defaults(run=command_list)
+
+    done = commands.add_parser("done", help="mark tasks as completed")
+    done.add_argument("ids", type=int, nargs="+")
+    done.add_argument("--undo", action="store_true", help="mark them as active again")
+    done.set_defaults(run=command_done)
+
+    clear = commands.add_parser("clear-completed", help="remove every completed task")
+    clear.set_defaults(run=command_clear_completed)
+
+    stats = commands.add_parser("stats", help="count tasks")
+    stats.add_argument("--categories", action="store_true", help="also count tasks per category")
+    stats.set_defaults(run=command_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    errors = []
+    todo = TodoList(args.file, args.storage, on_error=errors.append)
+    try:
+        todo.load()
+    except Exception as e:
+        # Never write over a data file that could not be read
+        print(f"Error loading tasks: {e}", file=sys.stderr)
+        return 1
+
+    try:
+        args.run(todo, args)
+    except ValueError as e:
+        errors.append(e)
+    except BrokenPipeError:
+        # Output piped into head and the like, stop the exit flush failing too
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        todo.release()
+
+    for error in errors:
+        print(f"Error: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+"""
+Phenry Todo Application - Todo List
+The task list, its categories and its storage, with no user interface attached
+"""
+
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+
+from data_transfer import IMPORT_BATCH, TASK_FIELDS, TransferReport, iter_tasks, task_record, write_records
+from records import Task
+from task_store import TaskStore
+from todo_storage import open_storage
+
+DEFAULT_CATEGORIES = ["General", "Work", "Personal", "Shopping", "Health", "Study"]
+
+# Tasks merged from another process that are announced one by one, more
+# than this and the list is refreshed once instead
+MERGE_ANNOUNCE_LIMIT = 50
+
+
+class TodoList:
+    """Tasks plus the storage they are saved to
+
+    Every change is saved as it is made. on_change(event, task) is called
+    afterwards with "on_task_added", "on_task_changed" or "on_task_removed".
+    Changes made inside a batch() block are saved together when it ends,
+    and on_refresh() is called once in place of their on_change calls.
+    Save errors are passed to on_error, or printed without one.
+
+    With shared storage, changes other processes saved are merged in
+    before every change and by sync(), and announced the same way.
+    """
+
+    def __init__(self, data_file="todo_data.json", storage_mode="journal",
+                 on_change=None, on_refresh=None, on_error=None):
+        self.store = TaskStore()
+        self.next_id = 1
+        self.data_file = data_file
+        # "journal" appends one record per change, "json" rewrites the file each time,
+        # "sqlite" moves the tasks into todo_data.db (migrating the JSON file once),
+        # "shared" is "journal" made safe for several processes using the file at once
+        self.storage_mode = storage_mode
+        self.storage = open_storage(data_file, storage_mode)
+        self.categories = list(DEFAULT_CATEGORIES)
+        self.on_change = on_change
+        self.on_refresh = on_refresh
+        self.on_error = on_error
+
+        # Open batch() blocks and the changes they are holding back
+        self.batch_depth = 0
+        self.batch_changed = {}
+        self.batch_removed = set()
+        self.batch_dirty = False
+
+        # next_id of the shared file when it was last read or written, any
+        # higher id in the store was given out here and not saved yet
+        self.synced_next_id = 1
+
+    def load(self):
+        """Load the tasks from storage, errors are raised"""
+        self.store, self.next_id, saved_categories = self.storage.load()
+        self.synced_next_id = self.next_id
+        if saved_categories:
+            self.categories = saved_categories
+
+    def save(self, changed=(), removed=()):
+        """Save tasks, passing only the changed and removed ones when known"""
+        keep = [task.id for task in changed] + list(removed)
+        try:
+            with self.synced(keep):
+                self.storage.save(self.store, self.next_id, self.categories, changed, removed)
+                self.synced_next_id = self.next_id
+        except Exception as e:
+            self.report_error(e)
+
+    def close(self):
+        """Write everything out before the app exits"""
+        try:
+            with self.synced():
+                self.storage.close(self.store, self.next_id, self.categories)
+            # Shared storage compacts in the background, wait for it unlocked
+            self.storage.release()
+        except Exception as e:
+            self.report_error(e)
+
+    def sync(self):
+        """Merge in changes other processes saved, cheap when there are none"""
+        if not self.storage.shared or not self.storage.has_changes():
+            return
+        try:
+            with self.synced():
+                pass
+        except Exception as e:
+            self.report_error(e)
+
+    @contextmanager
+    def synced(self, keep=()):
+        """Hold the shared storage lock with other processes' changes merged in
+
+        Tasks whose ids are in keep are about to be saved by this process
+        and are left as they are.
+        """
+        if not self.storage.shared:
+            yield
+            return
+        with self.storage.lock():
+            changes = self.storage.changes()
+            if changes is not None:
+                self.merge_changes(changes, keep)
+            yield
+
+    @contextmanager
+    def changing(self):
+        """Merge in other processes' changes before making one here
+
+        The lock is held until the change is saved, so the change is made
+        to the latest saved task and nothing can be saved in between. Inside
+        a batch() the merge waits for the batch's save.
+        """
+        if self.batch_depth or not self.storage.shared:
+            yield
+            return
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(self.synced())
+            except Exception as e:
+                self.report_error(e)
+            yield
+
+    def merge_changes(self, changes, keep=()):
+        """Apply ExternalChanges to the store, keeping tasks not saved yet
+
+        A task is merged as a whole, the newer save of a task wins. Tasks in
+        keep or held by an open batch are this process's changes waiting to
+        be saved, and win over the merged ones. When another process gave
+        out an id this one used for a task it has not saved yet, the local
+        task moves to a fresh id.
+
+        Each merged task is announced before the next one is applied, so
+        on_change always finds the rest of the store as it was shown. More
+        than MERGE_ANNOUNCE_LIMIT of them, or any inside a batch, are
+        applied first and shown with one refresh.
+        """
+        store = self.store
+        keep = set(keep) | self.batch_changed.keys() | self.batch_removed
+        if changes.full:
+            removed = [task.id for task in store if task.id not in changes.tasks]
+        else:
+            removed = changes.removed
+        # An id at or past synced_next_id was given out by both processes,
+        # the local task with it is not the one the other process saved
+        removed = [task_id for task_id in removed
+                   if task_id < self.synced_next_id and task_id not in keep and task_id in store]
+        merged = []
+        for task in changes.tasks.values():
+            local = store.get(task.id)
+            if task.id < self.synced_next_id and (
+                    task.id in keep or (local is not None and same_task(local, task))):
+                continue
+            merged.append(task)
+
+        count = len(removed) + len(merged)
+        quiet = count > MERGE_ANNOUNCE_LIMIT or self.batch_depth or not self.on_change
+
+        def announce(event, task):
+            if not quiet:
+                self.on_change(event, task)
+
+        for task_id in removed:
+            announce("on_task_removed", store.remove(task_id))
+
+        next_id = max(self.next_id, changes.next_id)
+        for task in merged:
+            local = store.get(task.id)
+            if local is None:
+                event = "on_task_added"
+            elif task.id >= self.synced_next_id:
+                # Both processes added a task with this id, the local one has
+                # not been announced yet, so it can move to a new id unseen
+                store.remove(task.id)
+                local.id = next_id
+                next_id += 1
+                store.add(local)
+                event = "on_task_added"
+            elif local.created_at == task.created_at:
+                # Changed in place so it keeps its place in the list
+                store.update(task.id, task.text, task.category)
+                store.set_completed(task.id, task.completed)
+                announce("on_task_changed", local)
+                continue
+            else:
+                event = "on_task_changed"
+            store.add(task)
+            announce(event, task)
+        self.next_id = next_id
+        self.synced_next_id = max(self.synced_next_id, changes.next_id)
+
+        for category in changes.categories or ():
+            if category not in self.categories:
+                self.categories.append(category)
+
+        if quiet and count:
+            if self.batch_depth:
+                self.batch_dirty = True
+            elif self.on_refresh:
+                self.on_refresh()
+
+    def release(self):
+        """Let go of the storage without the full write close() does"""
+        try:
+            self.storage.release()
+        except Exception as e:
+            self.report_error(e)
+
+    def report_error(self, error):
+        if self.on_error:
+            self.on_error(error)
+        else:
+            print(f"Error saving tasks: {error}")
+
+    def add_task(self, text, category="General"):
+        """Add a new task and return it, None if text is empty"""
+        if not text:
+            return None
+        with self.changing():
+            task = Task(
+                self.next_id,
+                text,
+                completed=False,
+                category=category,
+                created_at=datetime.now().strftime("%Y-%m-%d %H:%M")
+            )
+            self.store.add(task)
+            self.next_id += 1
+            self.task_changed("on_task_added", task)
+        return task
+
+    def toggle_task_completion(self, task_id):
+        """Toggle task completion status"""
+        with self.changing():
+            task = self.store.toggle(task_id)
+            if task is not None:
+                self.task_changed("on_task_changed", task)
+        return task
+
+    def set_completed(self, task_id, completed=True):
+        """Set the completion status of a task"""
+        with self.changing():
+            task = self.store.set_completed(task_id, completed)
+            if task is not None:
+                self.task_changed("on_task_changed", task)
+        return task
+
+    def delete_task(self, task_id):
+        """Delete a task"""
+        with self.changing():
+            task = self.store.remove(task_id)
+            if task is not None:
+                self.task_changed("on_task_removed", task)
+        return task
+
+    def edit_task(self, task_id, new_text, new_category):
+        """Edit an existing task"""
+        with self.changing():
+            task = self.store.update(task_id, new_text, new_category)
+            if task is not None:
+                self.task_changed("on_task_changed", task)
+        return task
+
+    def complete_tasks(self, task_ids, completed=True):
+        """Set the completion status of many tasks with one save"""
+        with self.batch():
+            for task_id in task_ids:
+                self.set_completed(task_id, completed)
+
+    def recategorize_tasks(self, task_ids, category):
+        """Move many tasks to a category with one save"""
+        with self.batch():
+            for task_id in task_ids:
+                task = self.store.get(task_id)
+                if task is not None:
+                    self.edit_task(task_id, task.text, category)
+
+    def delete_tasks(self, task_ids):
+        """Delete many tasks with one save"""
+        with self.batch():
+            for task_id in task_ids:
+                self.delete_task(task_id)
+
+    def clear_completed_tasks(self):
+        """Remove all completed tasks and return them"""
+        with self.changing():
+            removed = self.store.remove_completed()
+            if removed:
+                self.save(removed=[task.id for task in removed])
+        if self.on_refresh:
+            self.on_refresh()
+        return removed
+
+    @contextmanager
+    def batch(self):
+        """Group task changes into one save and one refresh
+
+            with todo.batch():
+                for text in texts:
+                    todo.add_task(text)
+
+        Blocks can nest, the outermost one does the save and refresh.
+        """
+        self.batch_depth += 1
+        try:
+            yield
+        finally:
+            try:
+                if self.batch_depth == 1:
+                    # Still open, so tasks merged by its save are refreshed with it
+                    self.flush_batch()
+            finally:
+                self.batch_depth -= 1
+            if not self.batch_depth and self.batch_dirty:
+                self.batch_dirty = False
+                if self.on_refresh:
+                    self.on_refresh()
+
+    def flush_batch(self):
+        """Save the changes held by the open batch without ending it"""
+        changed = list(self.batch_changed.values())
+        removed = list(self.batch_removed)
+        self.batch_changed = {}
+        self.batch_removed = set()
+        if changed or removed:
+            self.save(changed=changed, removed=removed)
+
+    def task_changed(self, event, task):
+        """Save and announce a task change, or hold it for the open batch"""
+        if self.batch_depth:
+            self.batch_dirty = True
+            if event == "on_task_removed":
+                self.batch_changed.pop(task.id, None)
+                self.batch_removed.add(task.id)
+            else:
+                self.batch_changed[task.id] = task
+            return
+
+        if event == "on_task_removed":
+            self.save(removed=[task.id])
+        else:
+            self.save(changed=[task])
+        if self.on_change:
+            self.on_change(event, task)
+
+    def import_tasks(self, path):
+        """Add or update tasks from a JSON Lines or CSV file
+
+        Records are read one at a time and, unless every save rewrites the
+        whole file, saved every IMPORT_BATCH tasks. A record whose id is
+        already in the list replaces that task, one without an id gets a new
+        one. Returns a TransferReport.
+        """
+        report = TransferReport()
+        seen = set()
+        with self.batch():
+            for task in iter_tasks(path, report):
+                if task.id is None:
+                    task.id = self.next_id
+                if task.id in seen or task.id in self.store:
+                    report.updated += 1
+                else:
+                    report.added += 1
+                seen.add(task.id)
+                self.next_id = max(self.next_id, task.id + 1)
+                if task.category not in self.categories:
+                    self.categories.append(task.category)
+
+                self.store.add(task)
+                self.task_changed("on_task_added", task)
+                if self.storage.incremental and len(self.batch_changed) >= IMPORT_BATCH:
+                    self.flush_batch()
+        return report
+
+    def export_tasks(self, path):
+        """Write every task to a JSON Lines or CSV file and return the count"""
+        return write_records(path, (task_record(task) for task in self.store), TASK_FIELDS)
+
+
+def same_task(a, b):
+    return (a.text, a.completed, a.category, a.created_at) == (b.text, b.completed, b.category, b.created_at)
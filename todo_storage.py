@@ -0,0 +1,905 @@
+"""
+Phenry Todo Application - Storage
+Backends that persist the task list to todo_data.json
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from file_lock import acquire_lock, file_identity
+from records import Task, encode_record, tasks_from_dicts
+from task_store import TaskStore, order_key
+
+# ORDER BY clauses for the task_store.SORT_ORDERS choices
+SQL_SORT_ORDERS = {
+    "list": "id",
+    "newest": "created_at DESC, id",
+    "oldest": "created_at, id",
+    "alpha": "py_casefold(text), id",
+    "category": "category, id",
+    "status": "completed, id",
+}
+
+# Journal records written before a background compaction is started
+COMPACT_EVERY = 500
+
+# Seconds after which a journal renamed for compaction counts as abandoned,
+# writing a snapshot never takes that long
+ABANDONED_COMPACTION = 60
+
+# Characters read at a time when only the start of the data file is wanted
+HEAD_CHUNK = 1 << 16
+
+TASKS_START = re.compile(r'\s*\{\s*"tasks"\s*:\s*\[')
+SEPARATORS = re.compile(r'[\s,]*')
+
+
+def dump_snapshot(path, tasks, next_id, categories, version=None):
+    """Write the full data file to path and sync it to disk"""
+    data = {
+        "tasks": tasks,
+        "next_id": next_id,
+        "categories": categories
+    }
+    if version is not None:
+        data["version"] = version
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, default=encode_record)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write_snapshot(path, tasks, next_id, categories, version=None):
+    """Atomically write the full data file"""
+    tmp_path = path + ".tmp"
+    dump_snapshot(tmp_path, tasks, next_id, categories, version=version)
+    os.replace(tmp_path, path)
+
+
+def read_first_tasks(path, limit):
+    """Decode up to limit tasks from the start of a data file, leaving the rest unread
+
+    Returns (tasks, complete), complete when the file holds no more tasks,
+    or None when the file does not start with its task list.
+    """
+    decoder = json.JSONDecoder()
+    tasks = []
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read(HEAD_CHUNK)
+        match = TASKS_START.match(text)
+        if match is None:
+            return None
+        position = match.end()
+        while len(tasks) < limit:
+            position = SEPARATORS.match(text, position).end()
+            if text.startswith("]", position):
+                return tasks, True
+            try:
+                item, position = decoder.raw_decode(text, position)
+            except ValueError:
+                # The next task runs past what has been read so far
+                chunk = f.read(HEAD_CHUNK)
+                if not chunk:
+                    return None
+                text = text[position:] + chunk
+                position = 0
+                continue
+            if not isinstance(item, dict):
+                return None
+            tasks.append(Task.from_dict(item))
+    return tasks, False
+
+
+def read_journal(path, offset=0):
+    """Read the whole records of a journal from offset, returning (records, end offset)
+
+    A torn last line from a crash mid-write is cut off the file. A line
+    that does not parse but was followed by more records is skipped, it
+    is what is left of an append that failed.
+    """
+    records = []
+    end = offset
+    if not os.path.exists(path):
+        return records, end
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    if end < os.path.getsize(path):
+        # Drop the torn tail so new records start on a clean line
+        with open(path, 'r+b') as f:
+            f.truncate(end)
+    return records, end
+
+
+def append_journal(f, lines):
+    """Append lines to a journal opened with open(path, 'a+b', buffering=0)
+
+    If the write fails partway, the part that made it is cut off again so
+    the next record does not land on the end of it. Should that fail too,
+    the next append starts on a fresh line instead.
+    """
+    data = ("\n".join(lines) + "\n").encode('utf-8')
+    start = f.seek(0, os.SEEK_END)
+    if start:
+        f.seek(start - 1)
+        if f.read(1) != b"\n":
+            data = b"\n" + data
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[f.write(view):]
+    except OSError:
+        try:
+            os.ftruncate(f.fileno(), start)
+        except OSError:
+            pass
+        raise
+    return start + len(data)
+
+
+class ExternalChanges:
+    """Task changes other processes saved, as found by SharedStorage.changes()
+
+    tasks maps ids to added or changed tasks and removed holds deleted ids.
+    After a full read tasks holds every task and removed is empty.
+    """
+
+    def __init__(self, tasks, removed, next_id, categories, full=False):
+        self.tasks = tasks
+        self.removed = removed
+        self.next_id = next_id
+        self.categories = categories
+        self.full = full
+
+
+class JsonStorage:
+    """Rewrites the whole JSON file on every save"""
+
+    # Whether a save only costs as much as the changes it is given, so that
+    # bulk changes are worth saving a slice at a time
+    incremental = False
+    # Whether other processes may change the file while it is open, see SharedStorage
+    shared = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Load (store, next_id, categories) from disk"""
+        tasks, next_id, categories = self.read()
+        return TaskStore(tasks), next_id, categories
+
+    def read(self):
+        """Read (tasks, next_id, categories) from disk, tasks as Task records"""
+        if not os.path.exists(self.path):
+            return [], 1, []
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        return tasks_from_dicts(data.get("tasks", [])), data.get("next_id", 1), data.get("categories", [])
+
+    def load_first(self, limit):
+        """Read the first limit tasks in list order without a full load, or None
+
+        Used to show a first page while load() is still to come. None means
+        there is no cheaper way to get them than load().
+        """
+        if not os.path.exists(self.path):
+            return []
+        first = read_first_tasks(self.path, limit)
+        return None if first is None else first[0]
+
+    def save(self, store, next_id, categories, changed=(), removed=()):
+        """Save the tasks, changed and removed are hints for incremental backends"""
+        write_snapshot(self.path, store.to_list(), next_id, categories)
+
+    def close(self, store, next_id, categories):
+        """Flush everything before the app exits"""
+        self.save(store, next_id, categories)
+
+    def release(self):
+        """Let go of open files once every change is saved, without a final rewrite"""
+
+
+class JournalStorage(JsonStorage):
+    """Appends one record per change and compacts into the JSON file in the background
+
+    The JSON file stays a normal snapshot in the usual format. Changes made
+    after it was written live in a journal next to it, one JSON record per
+    line. Records hold the full state of a task, so replaying them over any
+    snapshot that already contains some of them is harmless.
+    """
+
+    incremental = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.journal_path = path + ".journal"
+        # Journal being compacted away, kept until its snapshot is on disk
+        self.old_journal_path = path + ".journal.old"
+        self.journal = None
+        self.records = 0
+        self.compactor = None
+
+    def read(self):
+        """Read the snapshot and replay the journals on top of it"""
+        task_list, next_id, categories = super().read()
+        tasks = {task.id: task for task in task_list}
+
+        for path in (self.old_journal_path, self.journal_path):
+            records, end = read_journal(path)
+            for record in records:
+                next_id = max(next_id, record.get("next_id", next_id))
+                if "put" in record:
+                    task = Task.from_dict(record["put"])
+                    tasks[task.id] = task
+                for task_id in record.get("del", ()):
+                    tasks.pop(task_id, None)
+            if path == self.journal_path:
+                self.records += len(records)
+
+        return list(tasks.values()), next_id, categories
+
+    def load_first(self, limit):
+        """Read the first tasks of the snapshot with the journals replayed over them"""
+        records = read_journal(self.old_journal_path)[0] + read_journal(self.journal_path)[0]
+        # Read past the page by as many tasks as the journals may delete from it
+        deleted = sum(len(record.get("del", ())) for record in records)
+        first = read_first_tasks(self.path, limit + deleted) if os.path.exists(self.path) else ([], True)
+        if first is None:
+            return None
+        task_list, complete = first
+        tasks = {task.id: task for task in task_list}
+        for record in records:
+            if "put" in record:
+                task = Task.from_dict(record["put"])
+                # Tasks past the ones read belong to later pages
+                if complete or task.id in tasks:
+                    tasks[task.id] = task
+            for task_id in record.get("del", ()):
+                tasks.pop(task_id, None)
+        return list(tasks.values())[:limit]
+
+    def save(self, store, next_id, categories, changed=(), removed=()):
+        """Append the changes to the journal, or compact when given none"""
+        if not changed and not removed:
+            self.compact(store, next_id, categories)
+            return
+
+        if self.journal is None:
+            self.journal = open(self.journal_path, 'a+b', buffering=0)
+        lines = [json.dumps({"put": task.to_dict(), "next_id": next_id}, separators=(',', ':')) for task in changed]
+        if removed:
+            lines.append(json.dumps({"del": list(removed), "next_id": next_id}, separators=(',', ':')))
+        append_journal(self.journal, lines)
+
+        self.records += len(lines)
+        if self.records >= COMPACT_EVERY:
+            self.compact(store, next_id, categories, background=True)
+
+    def compact(self, store, next_id, categories, background=False):
+        """Write a fresh snapshot and drop the journal it covers"""
+        if self.compactor is not None and self.compactor.is_alive():
+            if background:
+                return
+            self.compactor.join()
+
+        self._rotate()
+        # A shallow copy is enough, anything that changes after this point is
+        # also in the new journal and wins on replay
+        tasks = store.to_list()
+        categories = list(categories)
+
+        if background:
+            self.compactor = threading.Thread(
+                target=self._write_snapshot,
+                args=(tasks, next_id, categories),
+                daemon=True
+            )
+            self.compactor.start()
+        else:
+            self._write_snapshot(tasks, next_id, categories)
+
+    def close(self, store, next_id, categories):
+        """Compact everything before the app exits"""
+        self.compact(store, next_id, categories)
+
+    def release(self):
+        """Close the journal and wait for a running compaction, leaving the rest for later"""
+        if self.compactor is not None:
+            self.compactor.join()
+            self.compactor = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def _rotate(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        self.records = 0
+        if not os.path.exists(self.journal_path):
+            return
+        if os.path.exists(self.old_journal_path):
+            # A previous compaction failed, keep its records too
+            with open(self.journal_path, 'r') as src, open(self.old_journal_path, 'a') as dst:
+                dst.write(src.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.old_journal_path)
+
+    def _write_snapshot(self, tasks, next_id, categories):
+        try:
+            write_snapshot(self.path, tasks, next_id, categories)
+            if os.path.exists(self.old_journal_path):
+                os.remove(self.old_journal_path)
+        except Exception as e:
+            print(f"Error compacting tasks: {e}")
+
+
+class SharedStorage(JournalStorage):
+    """Journal storage that several processes can use at once
+
+    Every write happens under an advisory lock on a .lock file next to the
+    data file. Journal records are numbered and the snapshot notes the last
+    record it holds, so a process can tell exactly which records it has
+    not seen. Before saving, a process reads the records others appended
+    since it last looked and merges them (see changes()), then appends its
+    own. Checking for changes costs two stat() calls.
+
+    Compaction renames the journal to .journal.old under the lock and
+    writes the snapshot on a background thread. The snapshot is swapped in
+    and the old journal dropped under the lock again. Processes part way
+    through the old journal keep reading it until then, so they only have
+    to read the whole file again if they fall a full compaction behind.
+    """
+
+    shared = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.lock_path = path + ".lock"
+        self.lock_file = None
+        self.lock_depth = 0
+        # Last record number read or written
+        self.version = 0
+        # What the snapshot looked like, and which journal was read how far
+        self.snapshot_identity = None
+        self.journal_inode = None
+        self.offset = 0
+        self.categories_written = None
+
+    @contextmanager
+    def lock(self):
+        """Hold the lock on the data file, calls can nest"""
+        if self.lock_depth == 0:
+            self.lock_file = acquire_lock(self.lock_path)
+        self.lock_depth += 1
+        try:
+            yield
+        finally:
+            self.lock_depth -= 1
+            if self.lock_depth == 0:
+                # Closing the file releases the lock
+                self.lock_file.close()
+                self.lock_file = None
+
+    def load(self):
+        with self.lock():
+            return super().load()
+
+    def load_first(self, limit):
+        with self.lock():
+            return super().load_first(limit)
+
+    def read(self):
+        """Read the snapshot and every journal record after it"""
+        self.snapshot_identity = file_identity(self.path)
+        tasks, next_id, categories, version = [], 1, [], 0
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            tasks = tasks_from_dicts(data.get("tasks", []))
+            next_id = data.get("next_id", 1)
+            categories = data.get("categories", [])
+            version = data.get("version", 0)
+        tasks = {task.id: task for task in tasks}
+
+        # The journal being compacted away, or one left over from journal
+        # storage whose records are not numbered
+        old_records, _ = read_journal(self.old_journal_path)
+        records, self.offset = read_journal(self.journal_path)
+        journal = file_identity(self.journal_path)
+        self.journal_inode = journal[0] if journal else None
+        self.records = len(records)
+        snapshot_version = version
+        for record in old_records + records:
+            record_version = record.get("v")
+            if record_version is not None:
+                if record_version <= snapshot_version:
+                    # Already in the snapshot
+                    continue
+                version = record_version
+            next_id = max(next_id, record.get("next_id", next_id))
+            if "put" in record:
+                task = Task.from_dict(record["put"])
+                tasks[task.id] = task
+            for task_id in record.get("del", ()):
+                tasks.pop(task_id, None)
+            categories = record.get("categories", categories)
+        self.version = version
+        self.categories_written = list(categories)
+        return list(tasks.values()), next_id, categories
+
+    def has_changes(self):
+        """Check whether another process has saved since this one last looked"""
+        if file_identity(self.path) != self.snapshot_identity:
+            return True
+        journal = file_identity(self.journal_path)
+        if journal is None and self.journal_inode is not None:
+            # This process may have just renamed its journal for compaction
+            journal = file_identity(self.old_journal_path)
+        if journal is None:
+            return self.journal_inode is not None
+        return journal[:2] != (self.journal_inode, self.offset)
+
+    def changes(self):
+        """Get the ExternalChanges saved by other processes, or None
+
+        Only the journal records appended since this process last looked are
+        read, following on into the next journal when the one it was reading
+        has been renamed for compaction. When those records are gone, the
+        whole file is read again and returned as a full set of tasks. Call
+        it holding lock().
+        """
+        if not self.has_changes():
+            return None
+        records = self._unseen_records()
+        if records is not None:
+            version = self.version
+            tasks = {}
+            removed = set()
+            next_id = 1
+            categories = None
+            for record in records:
+                record_version = record.get("v", version + 1)
+                if record_version <= version:
+                    continue
+                if record_version != version + 1:
+                    # Some records in between are gone
+                    break
+                version = record_version
+                next_id = max(next_id, record.get("next_id", next_id))
+                if "put" in record:
+                    task = Task.from_dict(record["put"])
+                    tasks[task.id] = task
+                    removed.discard(task.id)
+                for task_id in record.get("del", ()):
+                    tasks.pop(task_id, None)
+                    removed.add(task_id)
+                categories = record.get("categories", categories)
+            else:
+                self.version = version
+                self.snapshot_identity = file_identity(self.path)
+                if categories is not None:
+                    self.categories_written = list(categories)
+                return ExternalChanges(tasks, removed, next_id, categories)
+
+        task_list, next_id, categories = self.read()
+        return ExternalChanges({task.id: task for task in task_list}, set(), next_id, categories, full=True)
+
+    def _unseen_records(self):
+        # Records after the ones this process has seen, or None if they are gone.
+        # Moves journal_inode and offset past them
+        journal = file_identity(self.journal_path)
+        old_journal = file_identity(self.old_journal_path)
+        if journal is not None and journal[0] == self.journal_inode:
+            segments = [(self.journal_path, journal, self.offset)]
+        elif old_journal is not None and old_journal[0] == self.journal_inode:
+            # Renamed for compaction, finish it and carry on with the new one
+            segments = [(self.old_journal_path, old_journal, self.offset)]
+            if journal is not None:
+                segments.append((self.journal_path, journal, 0))
+        elif self.journal_inode is None and file_identity(self.path) == self.snapshot_identity:
+            # There was no journal when this process last looked, records it
+            # has already seen are skipped by their numbers
+            segments = [(path, identity, 0) for path, identity in
+                        ((self.old_journal_path, old_journal), (self.journal_path, journal)) if identity]
+        else:
+            return None
+
+        records = []
+        for path, identity, offset in segments:
+            if identity[1] < offset:
+                # A new file that got the same inode
+                return None
+            segment_records, end = read_journal(path, offset)
+            records.extend(segment_records)
+            if offset == 0:
+                self.records = 0
+            self.records += len(segment_records)
+        if segments:
+            self.journal_inode = segments[-1][1][0]
+            self.offset = end
+        return records
+
+    def save(self, store, next_id, categories, changed=(), removed=()):
+        """Append the changes to the journal, or compact when given none
+
+        The caller holds lock() and has merged changes() into store.
+        """
+        with self.lock():
+            if not changed and not removed:
+                self.compact(store, next_id, categories)
+                return
+
+            records = [{"put": task.to_dict()} for task in changed]
+            if removed:
+                records.append({"del": list(removed)})
+            if categories != self.categories_written:
+                records[-1]["categories"] = list(categories)
+            version = self.version
+            lines = []
+            for record in records:
+                version += 1
+                record["v"] = version
+                record["next_id"] = next_id
+                lines.append(json.dumps(record, separators=(',', ':')))
+            with open(self.journal_path, 'a+b', buffering=0) as f:
+                self.offset = append_journal(f, lines)
+                inode = os.fstat(f.fileno()).st_ino
+            if inode != self.journal_inode:
+                self.journal_inode = inode
+                self.records = 0
+            self.records += len(lines)
+            self.version = version
+            self.categories_written = list(categories)
+
+            if self.records >= COMPACT_EVERY:
+                self.compact(store, next_id, categories, background=True)
+
+    def close(self, store, next_id, categories):
+        """Start compacting everything before the app exits, release() waits for it
+
+        The snapshot is written without holding the lock, so other processes
+        can carry on saving meanwhile.
+        """
+        self.compact(store, next_id, categories, background=True)
+
+    def compact(self, store, next_id, categories, background=False):
+        """Write a fresh snapshot and drop the journals it covers
+
+        In the background this is skipped while a compaction, by this or any
+        other process, is still under way. A renamed journal nobody has
+        compacted for ABANDONED_COMPACTION seconds is taken over.
+        """
+        if background and self.compactor is not None and self.compactor.is_alive():
+            return
+
+        with self.lock():
+            if not background:
+                # A compaction still running finds its old journal gone and gives up
+                write_snapshot(self.path, store.to_list(), next_id, categories, version=self.version)
+                for path in (self.old_journal_path, self.journal_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.snapshot_identity = file_identity(self.path)
+                self.journal_inode = None
+                self.offset = 0
+                self.records = 0
+                return
+
+            old_journal = file_identity(self.old_journal_path)
+            if old_journal is not None:
+                if time.time() - old_journal[2] / 1e9 < ABANDONED_COMPACTION:
+                    return
+                # Everything in it is in store already, the snapshot covers it
+            elif os.path.exists(self.journal_path):
+                os.replace(self.journal_path, self.old_journal_path)
+            else:
+                return
+            # Renaming keeps the time of the last append, the age of a
+            # compaction counts from when it was started or taken over.
+            # A compaction this takes over finds the old journal changed
+            # and leaves it to this one
+            os.utime(self.old_journal_path)
+            old_journal = file_identity(self.old_journal_path)
+            # As with JournalStorage, a shallow copy is enough: anything that
+            # changes after this point is in the new journal too
+            self.compactor = threading.Thread(
+                target=self._write_shared_snapshot,
+                args=(store.to_list(), next_id, list(categories), self.version, old_journal),
+                daemon=True
+            )
+            self.compactor.start()
+
+    def _write_shared_snapshot(self, tasks, next_id, categories, version, old_journal):
+        # Write the snapshot unlocked, then swap it in under the lock as long
+        # as the old journal it replaces is still the same file
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            dump_snapshot(tmp_path, tasks, next_id, categories, version=version)
+            lock_file = acquire_lock(self.lock_path)
+            try:
+                if file_identity(self.old_journal_path) != old_journal:
+                    # Another process compacted everything in the meantime
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, self.path)
+                os.remove(self.old_journal_path)
+                self.snapshot_identity = file_identity(self.path)
+            finally:
+                lock_file.close()
+        except Exception as e:
+            print(f"Error compacting tasks: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class SqliteTaskStore:
+    """TaskStore interface over a SQLite table, filtering and paging in SQL"""
+
+    COLUMNS = "id, text, completed, category, created_at"
+
+    def __init__(self, conn):
+        self.conn = conn
+        # (total, completed), counted once and then kept up to date
+        self.counts = None
+
+    def __len__(self):
+        return self.stats()[0]
+
+    def __iter__(self):
+        cursor = self.conn.execute(f"SELECT {self.COLUMNS} FROM tasks ORDER BY id")
+        return (self._task(row) for row in cursor)
+
+    def __contains__(self, task_id):
+        return self.get(task_id) is not None
+
+    def get(self, task_id):
+        """Get a task by id, or None"""
+        row = self.conn.execute(f"SELECT {self.COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._task(row) if row else None
+
+    def add(self, task):
+        """Add a task, replacing any task with the same id"""
+        self.remove(task.id)
+        self.conn.execute(
+            "INSERT INTO tasks (id, text, completed, category, created_at) VALUES (?, ?, ?, ?, ?)",
+            self._row(task)
+        )
+        if self.counts is not None:
+            total, completed = self.counts
+            self.counts = total + 1, completed + bool(task.completed)
+
+    def add_many(self, tasks):
+        """Bulk insert tasks, used by the migration"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO tasks (id, text, completed, category, created_at) VALUES (?, ?, ?, ?, ?)",
+            (self._row(task) for task in tasks)
+        )
+        self.counts = None
+
+    def remove(self, task_id):
+        """Remove a task by id and return it, or None if missing"""
+        task = self.get(task_id)
+        if task is not None:
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            if self.counts is not None:
+                total, completed = self.counts
+                self.counts = total - 1, completed - task.completed
+        return task
+
+    def set_completed(self, task_id, completed):
+        """Set the completion status of a task"""
+        task = self.get(task_id)
+        if task is not None and task.completed != completed:
+            self.conn.execute("UPDATE tasks SET completed = ? WHERE id = ?", (int(completed), task_id))
+            task.completed = completed
+            if self.counts is not None:
+                total, done = self.counts
+                self.counts = total, done + (1 if completed else -1)
+        return task
+
+    def toggle(self, task_id):
+        """Flip the completion status of a task"""
+        task = self.get(task_id)
+        if task is not None:
+            task = self.set_completed(task_id, not task.completed)
+        return task
+
+    def update(self, task_id, text, category):
+        """Change the text and category of a task"""
+        self.conn.execute("UPDATE tasks SET text = ?, category = ? WHERE id = ?", (text, category, task_id))
+        return self.get(task_id)
+
+    def remove_completed(self):
+        """Remove all completed tasks and return them"""
+        removed = self.filter("completed")
+        self.conn.execute("DELETE FROM tasks WHERE completed = 1")
+        if self.counts is not None:
+            self.counts = self.counts[0] - len(removed), 0
+        return removed
+
+    def filter(self, status="all", category="All"):
+        """Get the tasks matching a status and category filter, in list order"""
+        return self.query(status, category)
+
+    def query(self, status="all", category="All", search="", limit=None, offset=0, sort="list", group=False):
+        """Filter, sort and page by status, category and lowercase search text in SQL"""
+        where, params = self._where(status, category, search)
+        sql = f"SELECT {self.COLUMNS} FROM tasks" + where
+        sql += " ORDER BY " + ("category, " if group else "") + SQL_SORT_ORDERS[sort]
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return [self._task(row) for row in self.conn.execute(sql, params)]
+
+    def sort_key(self, task, sort="list", group=False):
+        """Get the key of a task in the order query(sort=sort, group=group) returns"""
+        return order_key(task, sort, group, task.id)
+
+    def count(self, status="all", category="All"):
+        """Count the tasks matching a status and category filter"""
+        if category == "All":
+            total, active, completed = self.stats()
+            return {"all": total, "active": active, "completed": completed}[status]
+        sql = "SELECT COUNT(*) FROM tasks WHERE category = ?"
+        params = [category]
+        if status != "all":
+            sql += " AND completed = ?"
+            params.append(int(status == "completed"))
+        return self.conn.execute(sql, params).fetchone()[0]
+
+    def category_counts(self, status="all", category="All", search=""):
+        """Get {category: task count} over the tasks matching a filter"""
+        where, params = self._where(status, category, search)
+        return dict(self.conn.execute(f"SELECT category, COUNT(*) FROM tasks{where} GROUP BY category", params))
+
+    def stats(self):
+        """Get (total, active, completed) counts"""
+        if self.counts is None:
+            total, completed = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(completed), 0) FROM tasks"
+            ).fetchone()
+            self.counts = total, completed
+        total, completed = self.counts
+        return total, total - completed, completed
+
+    def to_list(self):
+        """Get all tasks as a list, in list order"""
+        return list(self)
+
+    def _where(self, status, category, search):
+        # WHERE clause and parameters for a status, category and search filter
+        clauses = []
+        params = []
+        if status != "all":
+            clauses.append("completed = ?")
+            params.append(int(status == "completed"))
+        if category != "All":
+            clauses.append("category = ?")
+            params.append(category)
+        if search:
+            clauses.append("instr(py_lower(text), ?) > 0")
+            params.append(search)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _task(self, row):
+        task_id, text, completed, category, created_at = row
+        return Task(task_id, text, bool(completed), category, created_at)
+
+    def _row(self, task):
+        return (task.id, task.text, int(bool(task.completed)), task.category, task.created_at)
+
+
+class SqliteStorage:
+    """Keeps the tasks in a SQLite database in WAL mode
+
+    The first time it is opened, an existing JSON data file (and its
+    journal) is copied into the database. The JSON file is left alone.
+    """
+
+    incremental = True
+    # SQLite already does its own locking between processes
+    shared = False
+
+    def __init__(self, path, json_path=None):
+        self.path = path
+        self.json_path = json_path
+        self.conn = None
+
+    def load(self):
+        """Open the database and return (store, next_id, categories)"""
+        self.conn = sqlite3.connect(self.path)
+        # Case is folded with Python's str methods the way TaskStore folds it,
+        # SQLite's lower() and NOCASE only fold ASCII letters
+        self.conn.create_function("py_lower", 1, str.lower, deterministic=True)
+        self.conn.create_function("py_casefold", 1, str.casefold, deterministic=True)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                text TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                category TEXT NOT NULL DEFAULT 'General',
+                created_at TEXT NOT NULL DEFAULT ''
+            );
+            CREATE INDEX IF NOT EXISTS tasks_completed ON tasks (completed);
+            CREATE INDEX IF NOT EXISTS tasks_category ON tasks (category);
+            CREATE INDEX IF NOT EXISTS tasks_created_at ON tasks (created_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+
+        store = SqliteTaskStore(self.conn)
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        if "next_id" not in meta:
+            self.migrate(store)
+            meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+
+        return store, int(meta["next_id"]), json.loads(meta["categories"])
+
+    def load_first(self, limit):
+        """load() only opens the database, pages are read as they are shown"""
+        return None
+
+    def migrate(self, store):
+        """One-shot copy of the JSON data file into the database"""
+        tasks, next_id, categories = [], 1, []
+        if self.json_path and os.path.exists(self.json_path):
+            tasks, next_id, categories = JournalStorage(self.json_path).read()
+        with self.conn:
+            store.add_many(tasks)
+            self._write_meta(next_id, categories)
+
+    def save(self, store, next_id, categories, changed=(), removed=()):
+        """Commit the changes the store already made"""
+        self._write_meta(next_id, categories)
+        self.conn.commit()
+
+    def close(self, store, next_id, categories):
+        """Commit and close the database before the app exits"""
+        if self.conn is None:
+            return
+        self.save(store, next_id, categories)
+        self.release()
+
+    def release(self):
+        """Close the database, every save has already been committed"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def _write_meta(self, next_id, categories):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("next_id", str(next_id)), ("categories", json.dumps(categories))]
+        )
+
+
+def open_storage(path, mode="journal"):
+    """Create the storage backend for a storage mode"""
+    if mode == "json":
+        return JsonStorage(path)
+    if mode == "journal":
+        return JournalStorage(path)
+    if mode == "shared":
+        return SharedStorage(path)
+    if mode == "sqlite":
+        return SqliteStorage(os.path.splitext(path)[0] + ".db", json_path=path)
+    raise ValueError(f"Unknown storage mode: {mode}")
@@ -0,0 +1,64 @@
+"""
+Phenry Todo Application - Widget Pool
+Dialogs and dropdown menus built on first use and reused afterwards
+"""
+
+from kivy.animation import Animation
+from kivy.core.window import Window
+
+
+class WidgetPool:
+    """Keeps dialogs and dropdown menus by name so each is only built once
+
+    Building an MDDialog or MDDropdownMenu creates its whole widget tree
+    and binds it to the window for good. Pooled widgets stay the same
+    between uses, so whatever they act on (a task id, a note id) is
+    kept by the caller and read by their buttons when pressed.
+    """
+
+    def __init__(self):
+        self.dialogs = {}
+        # name -> [items key, menu]
+        self.menus = {}
+
+    def dialog(self, name, build):
+        """Get the dialog called name, made by build() the first time"""
+        dialog = self.dialogs.get(name)
+        if dialog is None:
+            dialog = self.dialogs[name] = build()
+            # MDDialog only takes its height from its content when it opens,
+            # follow the content so new text is not clipped on reuse
+            dialog.ids.container.bind(height=dialog.setter('height'))
+        return dialog
+
+    def menu(self, name, caller, key, make_items, width_mult=4):
+        """Open the menu called name under caller and return it
+
+        make_items() gives the menu items. It is only called again when key
+        differs from the one the menu was last opened with, so a menu of
+        categories passes the categories as its key.
+        """
+        from kivymd.uix.menu import MDDropdownMenu
+
+        entry = self.menus.get(name)
+        if entry is None:
+            menu = MDDropdownMenu(caller=caller, items=make_items(), width_mult=width_mult)
+            self.menus[name] = [key, menu]
+        else:
+            menu = entry[1]
+            if entry[0] != key:
+                entry[0] = key
+                menu.items = make_items()
+            menu.caller = caller
+            if menu.parent is not None:
+                # Still closing from its last use
+                Animation.cancel_all(menu)
+                Window.remove_widget(menu)
+        menu.open()
+        return menu
+
+    def dismiss(self, name):
+        """Close the menu called name if it has been built"""
+        entry = self.menus.get(name)
+        if entry is not None:
+            entry[1].dismiss()